@@ -0,0 +1,130 @@
+################################################################################
+# Smartcat API benchmark
+#
+# Description:
+# Measures throughput and latency of uploads, downloads, project listings and
+# statistics made through the Smartcat class against the local mock server,
+# at different concurrency levels
+#
+# Notes:
+# > Usage: python smartcat_benchmark.py --documents 50 --concurrency 1 4 16 --latency 0.02
+# > Latency percentiles are taken from the Smartcat request hooks
+################################################################################
+import os
+import json
+import time
+import shutil
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from smartcatapi import Smartcat
+from smartcat_mock_server import MockSmartcatServer
+
+def percentile(values, fraction):
+    ############################################################################
+    # Get value at the given fraction (0 to 1) of the sorted values
+    ############################################################################
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+
+class Benchmark:
+    def __init__(self, server, documents, document_size, workdir):
+        self.server = server
+        self.documents = documents
+        self.document_size = document_size
+        self.workdir = workdir
+        self.source_files = []
+        for index in range(documents):
+            file_path = os.path.join(workdir, f'document_{index}.txt')
+            with open(file_path, 'w') as f:
+                f.write(('lorem ipsum dolor sit amet ' * (document_size // 27 + 1))[:document_size])
+            self.source_files.append(file_path)
+
+    def client(self, concurrency):
+        # identical concurrent listings would be coalesced into one request, measure every request instead
+        client = Smartcat(pool_maxsize=max(concurrency, 10), server_url=self.server.url, backoff_factor=0.05, api_login_id='benchmark', api_key='benchmark', coalesce_requests=False)
+        return client
+
+    def run_scenario(self, name, concurrency):
+        ########################################################################
+        # Run one scenario with a fresh client and project. Documents are
+        # uploaded beforehand for every scenario except 'upload', only the
+        # requests of the scenario itself are timed
+        #
+        # Return value:
+        # > Datatype - dictionary
+        # > scenario name, concurrency, operations, requests, seconds, throughput and latency percentiles
+        ########################################################################
+        client = self.client(concurrency)
+        latencies = []
+        client.add_request_hook(lambda event: latencies.append(event['latency']))
+        project_name = f'benchmark {name} {concurrency}'
+        client.create_project(project_name, 'en', ['fr'])
+        try:
+            if name != 'upload':
+                client.upload_documents(project_name, self.source_files, max_workers=concurrency)
+                client.get_project(project_name)
+            del latencies[:]
+            started = time.perf_counter()
+            operations = getattr(self, name)(client, project_name, concurrency)
+            elapsed = time.perf_counter() - started
+            requests = len(latencies)
+        finally:
+            client.delete_project(project_name)
+            client.close()
+        return {'scenario': name, 'concurrency': concurrency, 'operations': operations, 'seconds': round(elapsed, 4), 'operations_per_second': round(operations / elapsed, 2) if elapsed else 0, 'requests': requests, 'latency_p50': round(percentile(latencies[:requests], 0.5), 4), 'latency_p95': round(percentile(latencies[:requests], 0.95), 4), 'latency_max': round(max(latencies[:requests]), 4) if requests else 0}
+
+    def upload(self, client, project_name, concurrency):
+        results = client.upload_documents(project_name, self.source_files, max_workers=concurrency)
+        return sum(1 for result in results.values() if result[0])
+
+    def listing(self, client, project_name, concurrency):
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(lambda index: client.get_project(project_name, refresh=True), range(self.documents)))
+        return self.documents
+
+    def statistics(self, client, project_name, concurrency):
+        names = [os.path.basename(file_path) for file_path in self.source_files]
+        results = client.get_documents_statistics(project_name, names, max_workers=concurrency, retry_interval=0.05)
+        return sum(1 for result in results.values() if result[0])
+
+    def download(self, client, project_name, concurrency):
+        names = [os.path.basename(file_path) for file_path in self.source_files]
+        output = tempfile.mkdtemp(dir=self.workdir)
+        results = client.download_documents(project_name, {name: os.path.join(output, name) for name in names}, batch_size=1, max_workers=concurrency, poll_interval=0.05)
+        return sum(1 for result in results.values() if result[0])
+
+
+################################################################################
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the Smartcat client against the local mock server')
+    parser.add_argument('--documents', type=int, default=50, help='number of documents per scenario')
+    parser.add_argument('--document-size', type=int, default=4096, help='size in bytes of uploaded documents')
+    parser.add_argument('--payload-size', type=int, default=64*1024, help='size in bytes of downloaded documents')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--scenarios', nargs='+', default=['upload', 'listing', 'statistics', 'download'], choices=['upload', 'listing', 'statistics', 'download'])
+    parser.add_argument('--latency', type=float, default=0.01, help='seconds of latency added by the mock server')
+    parser.add_argument('--throttle-rate', type=float, default=None, help='requests per second before the mock server throttles')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='smartcat_benchmark_')
+    try:
+        with MockSmartcatServer(latency=args.latency, throttle_rate=args.throttle_rate, payload_size=args.payload_size) as server:
+            benchmark = Benchmark(server, args.documents, args.document_size, workdir)
+            results = []
+            for scenario in args.scenarios:
+                for concurrency in args.concurrency:
+                    results.append(benchmark.run_scenario(scenario, concurrency))
+                    if not args.json:
+                        result = results[-1]
+                        print(f"{result['scenario']:<12}concurrency {result['concurrency']:>3}  {result['operations']:>5} ops  {result['seconds']:>8.3f}s  {result['operations_per_second']:>9.2f} ops/s  {result['requests']:>5} requests  p50 {result['latency_p50']*1000:>8.1f}ms  p95 {result['latency_p95']*1000:>8.1f}ms")
+            if args.json:
+                print(json.dumps(results, indent=2))
+    finally:
+        shutil.rmtree(workdir)
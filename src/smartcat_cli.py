@@ -0,0 +1,303 @@
+################################################################################
+# Smartcat command line tool
+#
+# Description:
+# Batch upload, download, pretranslation status, word count, deletion and
+# directory sync of documents from the command line, built on the Smartcat class
+#
+# Notes:
+# > Usage: python smartcat_cli.py upload "My project" 'docs/**/*.docx' --workers 16
+#          python smartcat_cli.py download "My project" --output translated/
+#          python smartcat_cli.py status "My project" --wait
+#          python smartcat_cli.py wordcount "My project" --manifest documents.txt
+#          python smartcat_cli.py delete "My project" report.docx
+#          python smartcat_cli.py sync "My project" docs/ --download translated/ --delete
+# > Credentials are read from SMARTCAT_API_ID and SMARTCAT_API_KEY, or from
+#   the API credentials file given with --config (or SMARTCAT_CONFIG)
+# > Results are printed to stdout as JSON, progress is written to stderr.
+#   Exit status is 0 when every document succeeded, 1 otherwise
+################################################################################
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import threading
+from smartcatapi import Smartcat, _document_key
+
+def load_manifest(manifest_path):
+    ############################################################################
+    # Read manifest file: JSON (list of entries, or dictionary of document
+    # name to output path for downloads) or text with one entry per line,
+    # blank lines and lines starting with '#' are skipped
+    ############################################################################
+    with open(manifest_path, encoding='utf-8') as f:
+        if manifest_path.endswith('.json'):
+            return json.load(f)
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+
+
+class Progress:
+    ############################################################################
+    # Single line progress report on stderr, updated at most every 'interval'
+    # seconds. Safe to call from worker threads
+    ############################################################################
+    def __init__(self, label, enabled=True, interval=0.2):
+        self.label = label
+        self.enabled = enabled
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._last = 0
+        self._finished = False
+        self._started = time.monotonic()
+
+    def update(self, done, total, detail=''):
+        if not self.enabled:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if self._finished or done < total and now - self._last < self.interval:
+                return
+            self._last = now
+            self._finished = done >= total
+            sys.stderr.write(f'\r[{self.label}] {done}/{total} {detail} ({now - self._started:.1f}s)\033[K')
+            if self._finished:
+                sys.stderr.write('\n')
+            sys.stderr.flush()
+
+
+class SmartcatCLI:
+    def __init__(self, args):
+        self.args = args
+        self.progress = not args.quiet and sys.stderr.isatty() or args.progress
+
+    def client(self):
+        ########################################################################
+        # Create Smartcat client with credentials from the environment or the
+        # credentials file
+        #
+        # Return value:
+        # > Datatype - Smartcat
+        # > client ready to make requests, SystemExit if no credentials found
+        ########################################################################
+        args = self.args
+        api_login_id = os.environ.get('SMARTCAT_API_ID')
+        api_key = os.environ.get('SMARTCAT_API_KEY')
+        credentials = {}
+        if api_login_id and api_key:
+            credentials = {'api_login_id': api_login_id, 'api_key': api_key}
+        elif args.config or Smartcat._config_file_path:
+            credentials = {'config_file_path': args.config or Smartcat._config_file_path}
+        client = Smartcat(pool_maxsize=max(args.workers, 10), max_retries=args.retries, rate_limit=args.rate_limit, server_url=args.server, **credentials)
+        client.set_debug(args.debug)
+        if client.authorization_header is None:
+            client.close()
+            raise SystemExit('smartcat: no API credentials, set SMARTCAT_API_ID and SMARTCAT_API_KEY or pass --config')
+        return client
+
+    def document_names(self, client, project_name):
+        ########################################################################
+        # File names of the documents given as arguments and in the manifest,
+        # of all documents of the project if none given. Smartcat methods drop
+        # directory and extension of these names to get the document name
+        ########################################################################
+        names = list(self.args.documents)
+        if self.args.manifest:
+            names += list(load_manifest(self.args.manifest))
+        if names:
+            return list(dict.fromkeys(names))
+        # a listed name without known extension gets an empty one, so a dot in the name is not taken for one
+        return list(dict.fromkeys(doc.name+(doc.get('extension') or '.') for doc in client.get_project(project_name).documents))
+
+    def run(self):
+        ########################################################################
+        # Run the selected command and print its JSON report
+        #
+        # Return value:
+        # > Datatype - integer
+        # > exit status
+        ########################################################################
+        started = time.monotonic()
+        with self.client() as client:
+            if not any(project.name == self.args.project for project in client.iter_projects(project_name=self.args.project)):
+                if self.args.command not in ('upload', 'sync') or not self.args.target_languages:
+                    raise SystemExit(f'smartcat: project {self.args.project!r} not found')
+                resp = client.create_project(self.args.project, self.args.source_language, self.args.target_languages, pretranslate=not self.args.no_pretranslate)
+                if resp['response_code'] != 200:
+                    raise SystemExit(f'smartcat: project {self.args.project!r} not created: {resp["response"]}')
+            results = getattr(self, self.args.command)(client, self.args.project)
+        succeeded = sum(1 for result in results.values() if result[0])
+        report = {'command': self.args.command, 'project': self.args.project, 'succeeded': succeeded, 'failed': len(results) - succeeded, 'seconds': round(time.monotonic() - started, 3), 'results': {key: {'ok': result[0], 'result': result[1]} for key, result in results.items()}}
+        json.dump(report, sys.stdout, indent=2 if self.args.pretty else None, default=lambda value: value.to_dict() if hasattr(value, 'to_dict') else str(value))
+        sys.stdout.write('\n')
+        return 0 if succeeded == len(results) else 1
+
+
+################################################################################
+# Commands
+
+    def upload(self, client, project_name):
+        args = self.args
+        paths = []
+        for pattern in list(args.files) + (list(load_manifest(args.manifest)) if args.manifest else []):
+            paths += sorted(glob.glob(pattern, recursive=True)) if any(c in pattern for c in '*?[') else [pattern]
+        paths = list(dict.fromkeys(paths))
+        progress = Progress('upload', self.progress)
+        sent = {}
+        totals = {'files': 0, 'bytes': 0}
+        lock = threading.Lock()
+
+        def file_progress(file_path, bytes_sent, file_size):
+            with lock:
+                totals['bytes'] += bytes_sent - sent.get(file_path, 0)
+                if bytes_sent >= file_size and sent.get(file_path, -1) < file_size:
+                    totals['files'] += 1
+                sent[file_path] = bytes_sent
+                done = totals['files']
+                megabytes = totals['bytes'] / 1024**2
+            progress.update(done, len(paths), f'files, {megabytes:.1f} MB sent')
+
+        results = client.upload_documents(project_name, paths, max_workers=args.workers, progress=file_progress, state_file=args.state_file, attempts=args.attempts)
+        progress.update(len(paths), len(paths), f'files, {totals["bytes"] / 1024**2:.1f} MB sent')
+        return results
+
+    def download(self, client, project_name):
+        args = self.args
+        if args.manifest and args.manifest.endswith('.json') and isinstance(load_manifest(args.manifest), dict):
+            documents = load_manifest(args.manifest)
+        else:
+            # translations are saved under the file name given, or listed for the project
+            documents = {name: os.path.join(args.output, os.path.basename(name).rstrip('.')) for name in self.document_names(client, project_name)}
+        for save_as in documents.values():
+            os.makedirs(os.path.dirname(os.path.abspath(save_as)), exist_ok=True)
+        progress = Progress('download', self.progress)
+        results = client.download_documents(project_name, documents, batch_size=args.batch_size, max_workers=args.workers, poll_interval=args.poll_interval, poll_timeout=args.timeout, progress=lambda name, done, total: progress.update(done, total, 'documents'))
+        return {name.rstrip('.'): result for name, result in results.items()}
+
+    def status(self, client, project_name):
+        args = self.args
+        names = self.document_names(client, project_name)
+        statuses = client.check_doc_pretranslation_status(project_name, names)
+        # results are keyed by document name, as returned by check_doc_pretranslation_status
+        missing = {_document_key(name): [False, 'Document not found'] for name in names if _document_key(name) not in statuses}
+        if not args.wait:
+            results = {name: [completed, 'completed' if completed else 'in progress'] for name, completed in statuses.items()}
+            results.update(missing)
+            return results
+        names = [name for name in names if _document_key(name) not in missing]
+        progress = Progress('status', self.progress)
+        results = {}
+        for name, completed in client.wait_for_pretranslation(project_name, names, timeout=args.timeout, poll_interval=args.poll_interval):
+            results[name] = [completed, 'completed' if completed else 'timed out']
+            progress.update(len(results), len(names), 'documents pretranslated')
+        results.update(missing)
+        return results
+
+    def wordcount(self, client, project_name):
+        args = self.args
+        progress = Progress('wordcount', self.progress)
+        statistics = client.get_documents_statistics(project_name, self.document_names(client, project_name), max_workers=args.workers, progress=lambda name, done, total: progress.update(done, total, 'documents'))
+        results = {}
+        for name, result in statistics.items():
+            if result[0]:
+                result = [True, {language: entry.get('words') for language, entry in result[1].languages.items()}]
+            results[name] = result
+        return results
+
+    def delete(self, client, project_name):
+        args = self.args
+        if args.whole_project:
+            return {project_name: [client.delete_project(project_name), 'project']}
+        names = list(args.documents) + (list(load_manifest(args.manifest)) if args.manifest else [])
+        if not names:
+            raise SystemExit('smartcat: give documents to delete, or --project to delete the whole project')
+        names = list(dict.fromkeys(names))
+        doc_ids = client.get_document_id(project_name, names)
+        found = [name for name in names if doc_ids.get(_document_key(name))]
+        results = {name: [False, 'Document not found'] for name in names if name not in found}
+        if found:
+            deleted = client.delete_document(project_name, found)
+            results.update({name: [deleted, 'deleted' if deleted else 'delete failed'] for name in found})
+        return results
+
+    def sync(self, client, project_name):
+        args = self.args
+        report = client.sync_directory(project_name, args.directory, pattern=args.pattern, manifest_file=args.sync_manifest, delete_removed=args.delete, download_dir=args.download, max_workers=args.workers)
+        results = {}
+        for status in ('uploaded', 'updated', 'unchanged', 'deleted', 'downloaded'):
+            results.update({path: [True, status] for path in report[status]})
+        results.update({path: [False, error] for path, error in report['failed'].items()})
+        return results
+
+
+################################################################################
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='smartcat', description='Batch operations on Smartcat projects')
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--config', default=os.environ.get('SMARTCAT_CONFIG'), help='API credentials file (default $SMARTCAT_CONFIG)')
+    common.add_argument('--server', default=os.environ.get('SMARTCAT_SERVER_URL'), help='Smartcat server url (default $SMARTCAT_SERVER_URL or https://smartcat.ai)')
+    common.add_argument('--workers', type=int, default=8, help='requests made in parallel')
+    common.add_argument('--retries', type=int, default=3, help='retries of throttled or failed requests')
+    common.add_argument('--rate-limit', type=float, default=None, help='maximum requests per second')
+    common.add_argument('--manifest', help='file listing documents or files, one per line or as JSON')
+    common.add_argument('--progress', action='store_true', help='show progress even when stderr is not a terminal')
+    common.add_argument('--quiet', action='store_true', help='do not show progress')
+    common.add_argument('--pretty', action='store_true', help='indent JSON output')
+    common.add_argument('--debug', action='store_true')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    upload = commands.add_parser('upload', parents=[common], help='upload files to a project')
+    upload.add_argument('project')
+    upload.add_argument('files', nargs='*', help='files or glob patterns')
+    upload.add_argument('--source-language', default='en', help='source language of a project to create')
+    upload.add_argument('--target-languages', nargs='+', help='create the project with these target languages if missing')
+    upload.add_argument('--no-pretranslate', action='store_true', help='disable pretranslation of a created project')
+    upload.add_argument('--state-file', help='JSON file recording uploaded files, to resume an interrupted upload')
+    upload.add_argument('--attempts', type=int, default=1, help='passes made over failed uploads')
+
+    download = commands.add_parser('download', parents=[common], help='download translated documents')
+    download.add_argument('project')
+    download.add_argument('documents', nargs='*', help='document names, all documents of the project if none given')
+    download.add_argument('--output', default='.', help='directory to save documents to')
+    download.add_argument('--batch-size', type=int, default=10, help='documents exported by one export task')
+    download.add_argument('--poll-interval', type=float, default=1, help='seconds between polls of an export task')
+    download.add_argument('--timeout', type=float, default=300, help='seconds to wait for an export task')
+
+    status = commands.add_parser('status', parents=[common], help='pretranslation status of documents')
+    status.add_argument('project')
+    status.add_argument('documents', nargs='*', help='document names, all documents of the project if none given')
+    status.add_argument('--wait', action='store_true', help='wait until pretranslation completes')
+    status.add_argument('--poll-interval', type=float, default=2, help='initial seconds between polls')
+    status.add_argument('--timeout', type=float, default=3600, help='seconds to wait with --wait')
+
+    wordcount = commands.add_parser('wordcount', parents=[common], help='word count of documents per target language')
+    wordcount.add_argument('project')
+    wordcount.add_argument('documents', nargs='*', help='document names, all documents of the project if none given')
+
+    delete = commands.add_parser('delete', parents=[common], help='delete documents or a whole project')
+    delete.add_argument('project')
+    delete.add_argument('documents', nargs='*', help='document names to delete')
+    delete.add_argument('--project', dest='whole_project', action='store_true', help='delete the whole project')
+
+    sync = commands.add_parser('sync', parents=[common], help='upload new and changed files of a directory, download changed translations')
+    sync.add_argument('project')
+    sync.add_argument('directory')
+    sync.add_argument('--pattern', default='**/*', help='glob pattern of files to sync, relative to the directory')
+    sync.add_argument('--sync-manifest', help='manifest of synced files (default .smartcat_sync.json in the directory)')
+    sync.add_argument('--delete', action='store_true', help='delete documents of files removed from the directory')
+    sync.add_argument('--download', help='directory to download changed translations to')
+    sync.add_argument('--source-language', default='en', help='source language of a project to create')
+    sync.add_argument('--target-languages', nargs='+', help='create the project with these target languages if missing')
+    sync.add_argument('--no-pretranslate', action='store_true', help='disable pretranslation of a created project')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    return SmartcatCLI(parse_args(argv)).run()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
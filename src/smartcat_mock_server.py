@@ -0,0 +1,333 @@
+################################################################################
+# Smartcat API mock server
+#
+# Description:
+# Local stand-in for the Smartcat integration API endpoints used by the
+# smartcatapi module (project create/list/delete, document upload, delete,
+# export and statistics) for offline testing and benchmarking
+#
+# Notes:
+# > State is kept in memory and lost when the server stops
+# > latency, throttling, payload size and processing delays are configurable
+# > Run as script to serve on a fixed port:
+#   python smartcat_mock_server.py --port 8080 --latency 0.05
+################################################################################
+import io
+import os
+import json
+import time
+import uuid
+import random
+import zipfile
+import argparse
+import threading
+from email.parser import BytesParser
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+class _Server(ThreadingHTTPServer):
+    # the default listen backlog of 5 resets connections of concurrent clients
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class MockSmartcatServer:
+    def __init__(self, host='127.0.0.1', port=0, latency=0, latency_jitter=0, throttle_rate=None, payload_size=1024, pretranslate_delay=0, export_delay=0, statistics_delay=0):
+        ########################################################################
+        # Args:
+        # host, port:
+        #     > address to listen on, port 0 picks a free port
+        # latency:
+        #     > Datatype - number
+        #     > seconds added to every response
+        # latency_jitter:
+        #     > Datatype - number
+        #     > random extra seconds (0 to latency_jitter) added to every response
+        # throttle_rate:
+        #     > Datatype - number
+        #     > requests per second served before answering 429, None for no throttling
+        # payload_size:
+        #     > Datatype - integer
+        #     > size in bytes of every exported translated document
+        # pretranslate_delay:
+        #     > Datatype - number
+        #     > seconds after upload until document pretranslation is completed
+        # export_delay:
+        #     > Datatype - number
+        #     > seconds after export request until export result is ready (204 before)
+        # statistics_delay:
+        #     > Datatype - number
+        #     > seconds after upload until statistics are built (202 before)
+        ########################################################################
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.throttle_rate = throttle_rate
+        self.payload_size = payload_size
+        self.pretranslate_delay = pretranslate_delay
+        self.export_delay = export_delay
+        self.statistics_delay = statistics_delay
+        self.request_count = 0
+        self.throttled_count = 0
+        self.projects = {}
+        self.tasks = {}
+        self._lock = threading.Lock()
+        self._throttle_window = (0, 0)
+        self._thread = None
+        self._server = _Server((host, port), self._handler())
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+
+    def start(self):
+        ########################################################################
+        # Serve requests in a background thread
+        #
+        # Return value:
+        # > Datatype - string
+        # > server url to pass as Smartcat 'server_url'
+        ########################################################################
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+
+################################################################################
+# Request handling
+
+    def _throttled(self):
+        if not self.throttle_rate:
+            return False
+        with self._lock:
+            second = int(time.monotonic())
+            window, count = self._throttle_window
+            if window != second:
+                window, count = second, 0
+            count += 1
+            self._throttle_window = (window, count)
+            if count > self.throttle_rate:
+                self.throttled_count += 1
+                return True
+            return False
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status, body=b'', content_type='application/json', headers=None):
+                if not isinstance(body, bytes):
+                    body = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _handle(self, method):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                with server._lock:
+                    server.request_count += 1
+                if server.latency or server.latency_jitter:
+                    time.sleep(server.latency + random.uniform(0, server.latency_jitter))
+                if server._throttled():
+                    return self._reply(429, {'error': 'Too many requests'}, headers={'Retry-After': '1'})
+                parts = urlsplit(self.path)
+                path = parts.path.rstrip('/')
+                prefix = '/api/integration/v1/'
+                if not path.startswith(prefix):
+                    return self._reply(404, {'error': 'Not found'})
+                try:
+                    status, response, content_type = server.route(method, path[len(prefix):], parse_qs(parts.query), body, self.headers.get('Content-Type', ''))
+                except Exception as err:
+                    status, response, content_type = 500, {'error': str(err)}, 'application/json'
+                self._reply(status, response, content_type)
+
+            def do_GET(self):
+                self._handle('GET')
+
+            def do_POST(self):
+                self._handle('POST')
+
+            def do_DELETE(self):
+                self._handle('DELETE')
+
+        return Handler
+
+    def _multipart_parts(self, body, content_type):
+        message = BytesParser().parsebytes(b'Content-Type: '+content_type.encode('utf-8')+b'\r\n\r\n'+body)
+        if not message.is_multipart():
+            return []
+        return [(part.get_filename(), part.get_payload(decode=True)) for part in message.get_payload()]
+
+    def route(self, method, path, query, body, content_type):
+        ########################################################################
+        # Dispatch request to endpoint emulation
+        #
+        # Return value:
+        # > Datatype - tuple(integer, object, string)
+        # > response code, JSON serializable object or bytes, content type
+        ########################################################################
+        segments = path.split('/')
+        with self._lock:
+            if method == 'POST' and path == 'project/create':
+                return self._create_project(json.loads(self._multipart_parts(body, content_type)[0][1]))
+            if method == 'GET' and path == 'project/list':
+                return self._list_projects(query)
+            if method == 'DELETE' and len(segments) == 2 and segments[0] == 'project':
+                return (204, b'', 'application/json') if self.projects.pop(segments[1], None) else (404, {'error': 'Project not found'}, 'application/json')
+            if method == 'POST' and path == 'project/document':
+                return self._upload_document(query['projectId'][0], self._multipart_parts(body, content_type))
+            if method == 'DELETE' and path == 'document':
+                return self._delete_documents(query.get('documentIds', []))
+            if method == 'GET' and path == 'document/statistics':
+                return self._statistics(query.get('documentId', []))
+            if method == 'POST' and path == 'document/export':
+                return self._export(query.get('documentIds', []))
+            if method == 'GET' and len(segments) == 3 and path.startswith('document/export/'):
+                return self._export_result(segments[2])
+        return 404, {'error': 'Not found'}, 'application/json'
+
+    def _now(self):
+        return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime())+'Z'
+
+    def _document_view(self, doc):
+        view = dict(doc)
+        view['pretranslateCompleted'] = time.monotonic() >= doc['_ready_at']
+        view['status'] = 'inProgress' if view['pretranslateCompleted'] else 'created'
+        return {key: value for key, value in view.items() if not key.startswith('_')}
+
+    def _project_view(self, project):
+        view = dict(project)
+        view['documents'] = [self._document_view(doc) for doc in project['documents']]
+        return view
+
+    def _create_project(self, payload):
+        project = {'id': str(uuid.uuid4()), 'name': payload['name'], 'sourceLanguage': payload['sourceLanguage'], 'targetLanguages': payload['targetLanguages'], 'creationDate': self._now(), 'modificationDate': self._now(), 'status': 'created', 'documents': []}
+        self.projects[project['id']] = project
+        return 200, self._project_view(project), 'application/json'
+
+    def _list_projects(self, query):
+        projects = list(self.projects.values())
+        if 'projectName' in query:
+            projects = [project for project in projects if query['projectName'][0] in project['name']]
+        offset = int(query.get('offset', ['0'])[0])
+        limit = int(query.get('limit', [str(len(projects))])[0])
+        return 200, [self._project_view(project) for project in projects[offset:offset+limit]], 'application/json'
+
+    def _upload_document(self, project_id, parts):
+        project = self.projects.get(project_id)
+        if project is None:
+            return 404, {'error': 'Project not found'}, 'application/json'
+        created = []
+        for filename, content in parts:
+            document_id = uuid.uuid4().hex[:24]
+            name, extension = os.path.splitext(filename)
+            for language in project['targetLanguages']:
+                doc = {'id': document_id+'_'+language, 'name': name, 'extension': extension, 'sourceLanguage': project['sourceLanguage'], 'targetLanguage': language, 'creationDate': self._now(), 'statusModificationDate': self._now(), 'wordsCount': len(content.split()), '_ready_at': time.monotonic() + self.pretranslate_delay, '_statistics_at': time.monotonic() + self.statistics_delay}
+                project['documents'].append(doc)
+                created.append(self._document_view(doc))
+        project['modificationDate'] = self._now()
+        return 200, created, 'application/json'
+
+    def _find_document(self, document_id):
+        for project in self.projects.values():
+            for doc in project['documents']:
+                if doc['id'] == document_id:
+                    return project, doc
+        return None, None
+
+    def _delete_documents(self, document_ids):
+        for document_id in document_ids:
+            project, doc = self._find_document(document_id)
+            if doc is None:
+                return 404, {'error': f'Document {document_id} not found'}, 'application/json'
+            project['documents'].remove(doc)
+        return 204, b'', 'application/json'
+
+    def _statistics(self, document_ids):
+        statistics = []
+        for document_id in document_ids:
+            project, doc = self._find_document(document_id)
+            if doc is None:
+                return 404, {'error': f'Document {document_id} not found'}, 'application/json'
+            if time.monotonic() < doc['_statistics_at']:
+                return 202, b'', 'application/json'
+            statistics.append({'language': doc['targetLanguage'], 'words': doc['wordsCount'], 'total': {'words': doc['wordsCount']}})
+        return 200, {'documentId': document_ids[0] if document_ids else '', 'statistics': statistics}, 'application/json'
+
+    def _export(self, document_ids):
+        documents = []
+        for document_id in document_ids:
+            project, doc = self._find_document(document_id)
+            if doc is None:
+                return 404, {'error': f'Document {document_id} not found'}, 'application/json'
+            documents.append(doc)
+        task_id = str(uuid.uuid4())
+        self.tasks[task_id] = {'documents': documents, 'ready_at': time.monotonic() + self.export_delay}
+        return 200, {'id': task_id, 'documentIds': document_ids}, 'application/json'
+
+    def _export_result(self, task_id):
+        task = self.tasks.get(task_id)
+        if task is None:
+            return 404, {'error': 'Task not found'}, 'application/json'
+        if time.monotonic() < task['ready_at']:
+            return 204, b'', 'application/json'
+        del self.tasks[task_id]
+        if len(task['documents']) == 1:
+            return 200, self._translated_content(task['documents'][0]), 'application/octet-stream'
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w') as zip_file:
+            for doc in task['documents']:
+                zip_file.writestr(doc['targetLanguage']+'/'+doc['name']+doc['extension'], self._translated_content(doc))
+        return 200, archive.getvalue(), 'application/zip'
+
+    def _translated_content(self, doc):
+        header = f'{doc["id"]}\n'.encode('utf-8')
+        return header + b'x' * max(self.payload_size - len(header), 0)
+
+
+################################################################################
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve a local Smartcat API mock')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0)
+    parser.add_argument('--latency-jitter', type=float, default=0)
+    parser.add_argument('--throttle-rate', type=float, default=None)
+    parser.add_argument('--payload-size', type=int, default=1024)
+    parser.add_argument('--pretranslate-delay', type=float, default=0)
+    parser.add_argument('--export-delay', type=float, default=0)
+    parser.add_argument('--statistics-delay', type=float, default=0)
+    args = parser.parse_args()
+    server = MockSmartcatServer(args.host, args.port, args.latency, args.latency_jitter, args.throttle_rate, args.payload_size, args.pretranslate_delay, args.export_delay, args.statistics_delay)
+    print(f'Serving Smartcat mock API on {server.url}')
+    server.serve_forever()
@@ -0,0 +1,438 @@
+################################################################################
+# Smartcat translation job pipeline
+#
+# Description:
+# Runs a full translation job (upload -> wait for pretranslation -> export ->
+# download) with the stages working concurrently on different documents, so
+# the first documents are downloaded while later ones are still uploading
+#
+# Notes:
+# > Stages are connected by bounded queues, a slow stage holds back the ones
+#   feeding it instead of letting work pile up in memory
+# > With a state file the stage reached by every file is recorded, a new run
+#   of the same job resumes each file from there
+# > Documents are tracked by the ids returned on upload, so older documents of
+#   the same name in the project are never exported in their place
+# > Usage:
+#   pipeline = TranslationPipeline(client, 'My project', 'translated/', state_file='job.json')
+#   report = pipeline.run('docs/**/*.docx')
+################################################################################
+import os
+import glob
+import json
+import time
+import uuid
+import queue
+import threading
+from smartcatapi import ExportTask
+
+class _PipelineState:
+    ############################################################################
+    # Stage reached by every file of a job persisted to a JSON state file.
+    # A recorded stage is only trusted while the size and modification time
+    # of the file are unchanged
+    ############################################################################
+    def __init__(self, state_file, project_name):
+        self.state_file = state_file
+        self.project_name = project_name
+        self._lock = threading.Lock()
+        self._state = {}
+        if state_file != None and os.path.isfile(state_file):
+            with open(state_file) as f:
+                self._state = json.load(f)
+
+    def _file_key(self, file_path):
+        stat = os.stat(file_path)
+        return os.path.abspath(file_path), stat.st_size, stat.st_mtime
+
+    def stage(self, file_path):
+        # tuple(stage, ids of the uploaded documents) or None
+        path, size, mtime = self._file_key(file_path)
+        with self._lock:
+            entry = self._state.get(self.project_name, {}).get(path)
+        if entry is None or entry['size'] != size or entry['mtime'] != mtime:
+            return None
+        return entry['stage'], entry.get('document_ids', [])
+
+    def record(self, file_path, stage, error=None, document_ids=None):
+        if self.state_file == None:
+            return
+        try:
+            path, size, mtime = self._file_key(file_path)
+        except FileNotFoundError:
+            # the source file was removed during the run, there is nothing to resume it from
+            return
+        with self._lock:
+            entries = self._state.setdefault(self.project_name, {})
+            if document_ids is None:
+                previous = entries.get(path)
+                document_ids = previous.get('document_ids', []) if previous is not None and previous['size'] == size and previous['mtime'] == mtime else []
+            entries[path] = {'stage': stage, 'size': size, 'mtime': mtime, 'error': error, 'document_ids': document_ids}
+            temp_path = self.state_file+'.'+uuid.uuid4().hex+'.part'
+            with open(temp_path, 'w') as f:
+                json.dump(self._state, f, indent=1)
+            os.replace(temp_path, self.state_file)
+
+
+class _StageStats:
+    ############################################################################
+    # Items processed by a stage, time its workers spent busy and the deepest
+    # its input queue got
+    ############################################################################
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.items = 0
+        self.failed = 0
+        self.busy = 0.0
+        self.max_queue = 0
+        self.started = None
+        self.finished = None
+
+    def queued(self, depth):
+        with self._lock:
+            self.max_queue = max(self.max_queue, depth)
+
+    def record(self, started, items=0, failed=0):
+        now = time.monotonic()
+        with self._lock:
+            self.items += items
+            self.failed += failed
+            self.busy += now - started
+            self.started = started if self.started is None else min(self.started, started)
+            self.finished = now
+
+    def snapshot(self):
+        with self._lock:
+            seconds = self.finished - self.started if self.started is not None else 0
+            return {'items': self.items, 'failed': self.failed, 'seconds': round(seconds, 4), 'busy_seconds': round(self.busy, 4), 'items_per_second': round(self.items / seconds, 2) if seconds else 0, 'max_queue': self.max_queue}
+
+
+class TranslationPipeline:
+    _stages = ('upload', 'pretranslation', 'export', 'download')
+    _failed_stage = {'upload': 'failed', 'pretranslation': 'uploaded', 'export': 'pretranslated', 'download': 'pretranslated'}
+
+    def __init__(self, client, project_name, output, state_file=None, upload_workers=4, download_workers=4, export_batch_size=10, queue_size=64, poll_interval=2, max_poll_interval=30, backoff=1.5, pretranslation_timeout=3600, export_poll_interval=1, export_timeout=300, progress=None):
+        ########################################################################
+        # Args:
+        # client:
+        #     > Datatype - Smartcat
+        #     > client with credentials loaded, shared by all stages
+        # project_name:
+        #     > Datatype - string
+        #     > name of an existing project to translate the files in
+        # output:
+        #     > Datatype - string or callable
+        #     > directory to save translations to under the source file name, or
+        #       function returning the path to save the translation of a file as
+        # state_file:
+        #     > Datatype - string
+        #     > path of JSON file recording the stage reached by every file, None to not record
+        # upload_workers, download_workers:
+        #     > Datatype - integer
+        #     > number of files uploaded and export results downloaded in parallel
+        # export_batch_size:
+        #     > Datatype - integer
+        #     > maximum number of documents exported by one export task
+        # queue_size:
+        #     > Datatype - integer
+        #     > maximum number of items waiting between two stages
+        # poll_interval, max_poll_interval, backoff:
+        #     > Datatype - number
+        #     > initial and maximum seconds between pretranslation polls, and the
+        #       factor the interval grows by while nothing completes
+        # pretranslation_timeout:
+        #     > Datatype - number
+        #     > seconds a document may wait for pretranslation before it fails
+        # export_poll_interval, export_timeout:
+        #     > Datatype - number
+        #     > seconds between polls of an export task and to wait for it
+        # progress:
+        #     > Datatype - callable
+        #     > called with (file path, stage, status) when a file completes or fails a stage
+        ########################################################################
+        assert isinstance(project_name, str), "'project_name' should be of type 'string'"
+        assert isinstance(output, str) or callable(output), "'output' should be of type 'string' or callable"
+        assert isinstance(upload_workers, int) and upload_workers > 0, "'upload_workers' should be a positive 'int'"
+        assert isinstance(download_workers, int) and download_workers > 0, "'download_workers' should be a positive 'int'"
+        assert isinstance(export_batch_size, int) and export_batch_size > 0, "'export_batch_size' should be a positive 'int'"
+        self.client = client
+        self.project_name = project_name
+        self.output = output
+        self.state_file = state_file
+        self.upload_workers = upload_workers
+        self.download_workers = download_workers
+        self.export_batch_size = export_batch_size
+        self.queue_size = queue_size
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.backoff = backoff
+        self.pretranslation_timeout = pretranslation_timeout
+        self.export_poll_interval = export_poll_interval
+        self.export_timeout = export_timeout
+        self.progress = progress
+
+    def save_path(self, file_path):
+        if callable(self.output):
+            return self.output(file_path)
+        return os.path.join(self.output, os.path.basename(file_path))
+
+    def run(self, paths_or_glob):
+        ########################################################################
+        # Translate files, returning once every file is downloaded or failed
+        #
+        # Args:
+        # paths_or_glob:
+        #     > Datatype - string or list
+        #     > glob pattern, e.g. 'docs/**/*.docx', or list of file paths and glob patterns
+        #
+        # Return value:
+        # > Datatype - dictionary
+        # > 'results': dictionary with file path as key and list of status and saved path or error message as value
+        # > 'stages': items, failures, seconds, busy seconds, throughput and deepest input queue of every stage
+        # > 'seconds': duration of the run
+        ########################################################################
+        assert isinstance(paths_or_glob, (str, list)), "'paths_or_glob' should be of type 'str' or 'list'"
+        if isinstance(paths_or_glob, str):
+            paths_or_glob = [paths_or_glob]
+        file_paths = []
+        for pattern in paths_or_glob:
+            file_paths += sorted(glob.glob(pattern, recursive=True)) if any(c in pattern for c in '*?[') else [pattern]
+        file_paths = list(dict.fromkeys(file_paths))
+        started = time.monotonic()
+        self._state = _PipelineState(self.state_file, self.project_name)
+        self._stats = {stage: _StageStats() for stage in self._stages}
+        self._queues = {stage: queue.Queue(maxsize=self.queue_size) for stage in self._stages}
+        self._results = {}
+        self._results_lock = threading.Lock()
+        resumed = {}
+        for file_path in file_paths:
+            if not os.path.isfile(file_path):
+                self._finish(file_path, 'upload', [False, 'File not found'])
+                continue
+            stage, document_ids = self._state.stage(file_path) or (None, [])
+            if stage == 'downloaded' and os.path.isfile(self.save_path(file_path)):
+                self._finish(file_path, 'download', [True, self.save_path(file_path)])
+            elif stage in ('uploaded', 'pretranslated') and document_ids:
+                resumed[file_path] = ({'uploaded': 'pretranslation', 'pretranslated': 'export'}[stage], document_ids)
+            else:
+                resumed[file_path] = ('upload', [])
+        if resumed:
+            self._project_id = self.client.get_project_id(self.project_name)
+            self._run_stages(resumed)
+        return {'results': {file_path: self._results[file_path] for file_path in file_paths}, 'stages': {stage: self._stats[stage].snapshot() for stage in self._stages}, 'seconds': round(time.monotonic() - started, 4)}
+
+    def _run_stages(self, files):
+        workers = [threading.Thread(target=self._upload_stage, daemon=True) for i in range(self.upload_workers)]
+        workers += [threading.Thread(target=self._pretranslation_stage, daemon=True), threading.Thread(target=self._export_stage, daemon=True)]
+        workers += [threading.Thread(target=self._download_stage, daemon=True) for i in range(self.download_workers)]
+        for worker in workers:
+            worker.start()
+        # resumed files enter at the stage after the one they reached, the others are fed to upload
+        try:
+            for file_path, (stage, document_ids) in files.items():
+                if stage != 'upload':
+                    self._put(stage, (file_path, document_ids))
+            for file_path, (stage, document_ids) in files.items():
+                if stage == 'upload':
+                    self._put('upload', file_path)
+        finally:
+            for i in range(self.upload_workers):
+                self._queues['upload'].put(None)
+            for worker in workers[:self.upload_workers]:
+                worker.join()
+            self._queues['pretranslation'].put(None)
+        for worker in workers[self.upload_workers:]:
+            worker.join()
+
+    def _put(self, stage, item):
+        self._queues[stage].put(item)
+        self._stats[stage].queued(self._queues[stage].qsize())
+
+    def _finish(self, file_path, stage, result):
+        with self._results_lock:
+            self._results[file_path] = result
+        if not result[0]:
+            if stage in self._stats:
+                self._stats[stage].record(time.monotonic(), failed=1)
+            try:
+                # keep the last stage completed so a new run does not repeat it
+                self._state.record(file_path, self._failed_stage[stage], f'{stage}: {result[1]}')
+            except Exception as err:
+                if self.client.debug:
+                    print(f'[Smartcat API:pipeline]State of {file_path} not recorded: {err}')
+        if self.progress is not None:
+            try:
+                self.progress(file_path, stage, result[0])
+            except Exception as err:
+                if self.client.debug:
+                    print(f'[Smartcat API:pipeline]Progress callback failed for {file_path}: {err}')
+
+    def _advance(self, file_path, stage, recorded_stage, next_stage, item, document_ids=None):
+        self._state.record(file_path, recorded_stage, document_ids=document_ids)
+        if self.progress is not None:
+            self.progress(file_path, stage, True)
+        self._put(next_stage, item)
+
+
+################################################################################
+# Stages
+
+    def _upload_stage(self):
+        while True:
+            file_path = self._queues['upload'].get()
+            if file_path is None:
+                return
+            try:
+                self._upload(file_path)
+            except Exception as err:
+                self._finish(file_path, 'upload', [False, str(err)])
+
+    def _upload(self, file_path):
+        started = time.monotonic()
+        resp = self.client.upload_document_to_project(self._project_id, file_path)
+        self.client._add_uploaded_documents(self.project_name, [resp])
+        if resp.status_code != 200:
+            self._finish(file_path, 'upload', [False, f'Upload failed with response code {resp.status_code}'])
+            return
+        # one document per target language is created, later stages follow these ids only
+        document_ids = [doc['id'] for doc in resp.json()]
+        if not document_ids:
+            self._finish(file_path, 'upload', [False, 'Upload response has no documents'])
+            return
+        self._stats['upload'].record(started, items=1)
+        self._advance(file_path, 'upload', 'uploaded', 'pretranslation', (file_path, document_ids), document_ids)
+
+    def _pretranslation_stage(self):
+        # pending documents are all checked with a single project listing per poll
+        pending = {}
+        upstream_done = False
+        delay = self.poll_interval
+        next_poll = time.monotonic()
+        try:
+            while not upstream_done or pending:
+                timeout = max(0, next_poll - time.monotonic()) if pending else None
+                if upstream_done:
+                    time.sleep(timeout)
+                else:
+                    try:
+                        item = self._queues['pretranslation'].get(timeout=timeout)
+                    except queue.Empty:
+                        pass
+                    else:
+                        if item is None:
+                            upstream_done = True
+                        else:
+                            if not pending:
+                                delay = self.poll_interval
+                                next_poll = time.monotonic() + delay
+                            pending[item[0]] = (item[1], time.monotonic())
+                        continue
+                started = time.monotonic()
+                try:
+                    document_index = self.client.get_document_index(self.project_name, refresh=True)
+                except Exception as err:
+                    document_index = None
+                    if self.client.debug:
+                        print(f'[Smartcat API:pipeline]Pretranslation poll failed: {err}')
+                completed = []
+                if document_index is not None:
+                    for file_path, (document_ids, since) in list(pending.items()):
+                        docs = [document_index.by_id.get(document_id) for document_id in document_ids]
+                        if None in docs:
+                            del pending[file_path]
+                            self._finish(file_path, 'pretranslation', [False, 'Document not found'])
+                        elif all(doc.pretranslate_completed for doc in docs):
+                            completed.append((file_path, document_ids))
+                for file_path, document_ids in completed:
+                    del pending[file_path]
+                self._stats['pretranslation'].record(started, items=len(completed))
+                for file_path, document_ids in completed:
+                    try:
+                        self._advance(file_path, 'pretranslation', 'pretranslated', 'export', (file_path, document_ids))
+                    except Exception as err:
+                        self._finish(file_path, 'pretranslation', [False, str(err)])
+                for file_path in [file_path for file_path, (document_ids, since) in pending.items() if time.monotonic() - since > self.pretranslation_timeout]:
+                    del pending[file_path]
+                    self._finish(file_path, 'pretranslation', [False, 'Pretranslation timed out'])
+                delay = self.poll_interval if completed else min(delay * self.backoff, self.max_poll_interval)
+                next_poll = time.monotonic() + delay
+        finally:
+            # let the export stage end even if this one stopped on an error
+            self._queues['export'].put(None)
+
+    def _export_stage(self):
+        upstream_done = False
+        try:
+            while not upstream_done:
+                # one export task for every document ready when the first one arrives, up to export_batch_size
+                batch = [self._queues['export'].get()]
+                while len(batch) < self.export_batch_size:
+                    try:
+                        batch.append(self._queues['export'].get_nowait())
+                    except queue.Empty:
+                        break
+                if None in batch:
+                    upstream_done = True
+                    batch = [item for item in batch if item is not None]
+                if not batch:
+                    continue
+                started = time.monotonic()
+                exported = []
+                try:
+                    document_index = self.client.get_document_index(self.project_name)
+                    for file_path, document_ids in batch:
+                        doc = document_index.by_id.get(document_ids[0])
+                        if doc is None:
+                            self._finish(file_path, 'export', [False, 'Document not found'])
+                        else:
+                            exported.append((file_path, doc.name, doc.id, self.save_path(file_path)))
+                except Exception as err:
+                    for file_path, document_ids in batch:
+                        self._finish(file_path, 'export', [False, f'Export task not created: {err}'])
+                    continue
+                # archive entries are matched by document name, so one export task never holds two documents of the same name
+                tasks = []
+                for doc in exported:
+                    for task_batch in tasks:
+                        if all(other[1] != doc[1] for other in task_batch):
+                            task_batch.append(doc)
+                            break
+                    else:
+                        tasks.append([doc])
+                for task_batch in tasks:
+                    try:
+                        task = self.client.create_export_task([doc[2] for doc in task_batch])
+                    except Exception as err:
+                        task = err
+                    if not isinstance(task, ExportTask):
+                        for doc in task_batch:
+                            self._finish(doc[0], 'export', [False, f'Export task not created: {task}'])
+                        continue
+                    self._stats['export'].record(started, items=len(task_batch))
+                    self._put('download', (task, task_batch))
+        finally:
+            for i in range(self.download_workers):
+                self._queues['download'].put(None)
+
+    def _download_stage(self):
+        while True:
+            item = self._queues['download'].get()
+            if item is None:
+                return
+            task, batch = item
+            started = time.monotonic()
+            try:
+                for doc in batch:
+                    os.makedirs(os.path.dirname(os.path.abspath(doc[3])), exist_ok=True)
+                results = self.client._save_export_result(self.client.get_export_result(task.id, self.export_poll_interval, self.export_timeout), batch)
+            except Exception as err:
+                results = {doc[0]: [False, str(err)] for doc in batch}
+            succeeded = [file_path for file_path, result in results.items() if result[0]]
+            self._stats['download'].record(started, items=len(succeeded))
+            for file_path, result in results.items():
+                if result[0]:
+                    try:
+                        self._state.record(file_path, 'downloaded')
+                    except Exception as err:
+                        result = [False, str(err)]
+                self._finish(file_path, 'download', result)
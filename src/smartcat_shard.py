@@ -0,0 +1,311 @@
+################################################################################
+# Smartcat sharded execution
+#
+# Description:
+# Spreads bulk uploads, downloads, statistics and deletions over several sets
+# of API credentials, each with its own rate limit, and optionally over worker
+# processes, merging the results into one report
+#
+# Notes:
+# > Every set of credentials must have access to the projects worked on
+# > Work is split into small units pulled from a shared queue by the workers
+#   of every account, so faster accounts take more units. An account whose
+#   requests get throttled stops taking units for a cooldown period
+# > With processes > 1 worker processes, each with its own clients for all
+#   accounts, pull units from one queue shared between them, so hashing,
+#   archive extraction and response parsing are not limited to one
+#   interpreter. The throttle cooldown of an account is shared by all
+#   processes and its rate_limit/rate_burst are divided between them
+# > Usage:
+#   sharded = ShardedSmartcat([{'api_login_id': 'id1', 'api_key': 'key1'}, {'config_file_path': 'account2.ini'}], processes=2)
+#   report = sharded.upload_documents('My project', 'docs/**/*.docx')
+################################################################################
+import glob
+import time
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from smartcatapi import Smartcat, _document_key
+
+class _Account:
+    ############################################################################
+    # Smartcat client of one set of credentials with the latency and
+    # throttling observed on its requests
+    ############################################################################
+    def __init__(self, index, credentials, client_options, throttle_cooldown, throttled_until, processes=1):
+        self.name = credentials.get('name') or credentials.get('api_login_id') or credentials.get('config_file_path') or f'account {index}'
+        options = dict(client_options, **{key: value for key, value in credentials.items() if key != 'name'})
+        # the request rate of the account is shared by all processes
+        if options.get('rate_limit'):
+            options['rate_limit'] = options['rate_limit'] / processes
+        if options.get('rate_burst'):
+            options['rate_burst'] = max(options['rate_burst'] / processes, 1)
+        self.client = Smartcat(**options)
+        self.index = index
+        self.throttle_cooldown = throttle_cooldown
+        self._lock = threading.Lock()
+        # wall clock deadlines by account index, a list shared with the other processes if there are any
+        self._throttled_until = throttled_until
+        self.stats = {'account': self.name, 'units': 0, 'items': 0, 'failed': 0, 'requests': 0, 'retries': 0, 'throttled': 0, 'latency_total': 0.0, 'busy_seconds': 0.0}
+        self.client.add_request_hook(self._observe)
+
+    def _observe(self, event):
+        throttled = event['status_code'] == 429 or event['retries'] > 0
+        with self._lock:
+            self.stats['requests'] += 1
+            self.stats['retries'] += event['retries']
+            self.stats['latency_total'] += event['latency']
+            self.stats['throttled'] += throttled
+        if throttled:
+            # requests had to be repeated, give the account a rest before it takes more work
+            self._throttled_until[self.index] = time.time() + self.throttle_cooldown
+
+    def wait_if_throttled(self):
+        delay = self._throttled_until[self.index] - time.time()
+        if delay > 0:
+            time.sleep(delay)
+
+    def record(self, started, results):
+        with self._lock:
+            self.stats['units'] += 1
+            self.stats['items'] += len(results)
+            self.stats['failed'] += sum(1 for result in results.values() if not result[0])
+            self.stats['busy_seconds'] += time.monotonic() - started
+
+
+################################################################################
+# Operations, run on one unit of work with the client of the account taking it
+
+
+def _upload(client, project_name, unit):
+    return client.upload_documents(project_name, unit, max_workers=1)
+
+
+def _download(client, project_name, unit):
+    return client.download_documents(project_name, dict(unit), batch_size=len(unit), max_workers=1)
+
+
+def _statistics(client, project_name, unit):
+    return client.get_documents_statistics(project_name, unit, max_workers=1)
+
+
+def _delete(client, project_name, unit):
+    doc_ids = client.get_document_id(project_name, unit)
+    results = {name: [False, 'Document not found'] for name in unit if not doc_ids.get(_document_key(name))}
+    found = [name for name in unit if name not in results]
+    if found:
+        deleted = client.delete_documents_by_id(project_name, [Id for name in found for Id in doc_ids[_document_key(name)]])
+        results.update({name: [deleted, 'deleted' if deleted else 'delete failed'] for name in found})
+    return results
+
+
+_operations = {'upload': _upload, 'download': _download, 'statistics': _statistics, 'delete': _delete}
+
+
+def _unit_keys(operation, unit):
+    # keys of the results of a unit, statistics are keyed by document name like Smartcat.get_documents_statistics
+    if operation == 'download':
+        return [item[0] for item in unit]
+    if operation == 'statistics':
+        return [_document_key(name) for name in unit]
+    return list(unit)
+
+
+def _run_units(credentials, client_options, workers_per_account, throttle_cooldown, operation, project_name, work, throttled_until, processes=1):
+    ############################################################################
+    # Run units of an operation taken from the work queue on all accounts in
+    # this process until the queue is empty
+    #
+    # Return value:
+    # > Datatype - tuple(dictionary, list)
+    # > results of the units run, statistics of every account
+    ############################################################################
+    accounts = [_Account(index, account_credentials, client_options, throttle_cooldown, throttled_until, processes) for index, account_credentials in enumerate(credentials)]
+    results = {}
+    results_lock = threading.Lock()
+
+    def worker(account):
+        while True:
+            account.wait_if_throttled()
+            try:
+                unit = work.get_nowait()
+            except queue.Empty:
+                return
+            started = time.monotonic()
+            try:
+                unit_results = _operations[operation](account.client, project_name, unit)
+            except Exception as err:
+                unit_results = {key: [False, str(err)] for key in _unit_keys(operation, unit)}
+            account.record(started, unit_results)
+            with results_lock:
+                results.update(unit_results)
+
+    threads = [threading.Thread(target=worker, args=(account,), daemon=True) for account in accounts for i in range(workers_per_account)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        for account in accounts:
+            account.client.close()
+    return results, [account.stats for account in accounts]
+
+
+class ShardedSmartcat:
+    def __init__(self, credentials, workers_per_account=4, processes=1, throttle_cooldown=5, **client_options):
+        ########################################################################
+        # Args:
+        # credentials:
+        #     > Datatype - list
+        #     > one dictionary per account with 'api_login_id' and 'api_key' or
+        #       'config_file_path', optionally 'server_url', other Smartcat
+        #       arguments (e.g. 'rate_limit') and a 'name' used in reports
+        # workers_per_account:
+        #     > Datatype - integer
+        #     > number of units every account works on at once (per process)
+        # processes:
+        #     > Datatype - integer
+        #     > number of worker processes, 1 to run in the calling process.
+        #       rate_limit and rate_burst of an account are divided between them
+        # throttle_cooldown:
+        #     > Datatype - number
+        #     > seconds an account takes no new units after its requests were throttled or retried
+        # client_options:
+        #     > arguments passed to every Smartcat client, e.g. max_retries or timeout
+        ########################################################################
+        assert isinstance(credentials, list) and credentials, "'credentials' should be a non-empty 'list'"
+        assert all(isinstance(account, dict) for account in credentials), "'credentials' should be a list of 'dict'"
+        assert isinstance(workers_per_account, int) and workers_per_account > 0, "'workers_per_account' should be a positive 'int'"
+        assert isinstance(processes, int) and processes > 0, "'processes' should be a positive 'int'"
+        self.credentials = credentials
+        self.workers_per_account = workers_per_account
+        self.processes = processes
+        self.throttle_cooldown = throttle_cooldown
+        self.client_options = client_options
+
+    def run(self, operation, project_name, units):
+        ########################################################################
+        # Run units of work of an operation over all accounts and processes
+        #
+        # Args:
+        # operation:
+        #     > Datatype - string
+        #     > 'upload', 'download', 'statistics' or 'delete'
+        # project_name:
+        #     > Datatype - string
+        #     > name of the project worked on
+        # units:
+        #     > Datatype - list
+        #     > units of work, each handled by one account in one call
+        #
+        # Return value:
+        # > Datatype - dictionary
+        # > 'results': merged results of all units as returned by the Smartcat method
+        # > 'accounts': units, items, failures, requests, retries, throttled requests, mean latency and busy seconds per account
+        # > 'seconds': duration of the run
+        ########################################################################
+        assert operation in _operations, f"'operation' should be one of {sorted(_operations)}"
+        started = time.monotonic()
+        arguments = (self.credentials, self.client_options, self.workers_per_account, self.throttle_cooldown, operation, project_name)
+        processes = min(self.processes, len(units))
+        if processes <= 1:
+            work = queue.Queue()
+            for unit in units:
+                work.put(unit)
+            outcomes = [_run_units(*arguments, work, [0] * len(self.credentials))]
+        else:
+            # processes pull units from one queue and see each other's throttled accounts
+            with multiprocessing.Manager() as manager:
+                work = manager.Queue()
+                for unit in units:
+                    work.put(unit)
+                throttled_until = manager.list([0] * len(self.credentials))
+                with ProcessPoolExecutor(max_workers=processes) as executor:
+                    futures = [executor.submit(_run_units, *arguments, work, throttled_until, processes) for i in range(processes)]
+                    outcomes = [future.result() for future in futures]
+        merged_results = {}
+        accounts = [dict(stats) for stats in outcomes[0][1]] if outcomes else []
+        for process_results, process_accounts in outcomes:
+            merged_results.update(process_results)
+        # report results in the order of the units given
+        results = {key: merged_results.pop(key) for unit in units for key in _unit_keys(operation, unit) if key in merged_results}
+        results.update(merged_results)
+        for process_results, process_accounts in outcomes[1:]:
+            for merged, stats in zip(accounts, process_accounts):
+                for key, value in stats.items():
+                    if key != 'account':
+                        merged[key] += value
+        for stats in accounts:
+            latency_total = stats.pop('latency_total')
+            stats['mean_latency'] = round(latency_total / stats['requests'], 4) if stats['requests'] else 0
+            stats['busy_seconds'] = round(stats['busy_seconds'], 4)
+        return {'results': results, 'accounts': accounts, 'seconds': round(time.monotonic() - started, 4)}
+
+
+################################################################################
+# Bulk operations
+
+    def upload_documents(self, project_name, paths_or_glob):
+        ########################################################################
+        # Upload files to a project, one file per unit
+        #
+        # Args:
+        # project_name:
+        #     > Datatype - string
+        #     > name of the project to which the files are to be uploaded
+        # paths_or_glob:
+        #     > Datatype - string or list
+        #     > glob pattern, or list of file paths and glob patterns
+        #
+        # Return value:
+        # > Datatype - dictionary
+        # > report of run(), results with file path as key as returned by Smartcat.upload_documents
+        ########################################################################
+        assert isinstance(paths_or_glob, (str, list)), "'paths_or_glob' should be of type 'str' or 'list'"
+        if isinstance(paths_or_glob, str):
+            paths_or_glob = [paths_or_glob]
+        file_paths = []
+        for pattern in paths_or_glob:
+            file_paths += sorted(glob.glob(pattern, recursive=True)) if any(c in pattern for c in '*?[') else [pattern]
+        return self.run('upload', project_name, [[file_path] for file_path in dict.fromkeys(file_paths)])
+
+    def download_documents(self, project_name, documents, batch_size=10):
+        ########################################################################
+        # Download translated documents, batch_size documents (one export task) per unit
+        #
+        # Args:
+        # documents:
+        #     > Datatype - dictionary
+        #     > filename with path to save document as, with document name as key
+        #
+        # Return value:
+        # > Datatype - dictionary
+        # > report of run(), results as returned by Smartcat.download_documents
+        ########################################################################
+        assert isinstance(documents, dict), "'documents' should be of type 'dict'"
+        items = list(documents.items())
+        return self.run('download', project_name, [items[i:i+batch_size] for i in range(0, len(items), batch_size)])
+
+    def get_documents_statistics(self, project_name, document_names, batch_size=1):
+        ########################################################################
+        # Get statistics of documents, batch_size documents per unit
+        #
+        # Return value:
+        # > Datatype - dictionary
+        # > report of run(), results as returned by Smartcat.get_documents_statistics
+        ########################################################################
+        assert isinstance(document_names, list), "'document_names' should be of type 'list'"
+        return self.run('statistics', project_name, [document_names[i:i+batch_size] for i in range(0, len(document_names), batch_size)])
+
+    def delete_document(self, project_name, document_names, batch_size=100):
+        ########################################################################
+        # Delete documents, batch_size documents per unit
+        #
+        # Return value:
+        # > Datatype - dictionary
+        # > report of run(), results with document name as key and list of status and message as value
+        ########################################################################
+        assert isinstance(document_names, list), "'document_names' should be of type 'list'"
+        return self.run('delete', project_name, [document_names[i:i+batch_size] for i in range(0, len(document_names), batch_size)])
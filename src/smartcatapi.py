@@ -13,16 +13,1218 @@
 # > The Project created has pretranslation using MT enabled by default
 ################################################################################
 import os
+import io
+import re
+import glob
+import time
+import uuid
+import random
+import threading
 import requests
+import shutil
 import base64
+import json
+import zlib
+import codecs
+import struct
+import hashlib
+import zipfile
+import datetime
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlencode, quote_plus
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from configparser import ConfigParser
+from requests.adapters import HTTPAdapter
+
+
+@lru_cache(maxsize=65536)
+def _document_key(document_name):
+    ############################################################################
+    # Name Smartcat gives a document uploaded from the given file: file name
+    # without directory and extension
+    ############################################################################
+    return os.path.splitext(os.path.basename(document_name))[0]
+
+
+@lru_cache(maxsize=16)
+def _read_api_credentials(config_file_path, mtime, size):
+    ############################################################################
+    # Read API login id and key from config file, parsed once per version of
+    # the file (path, modification time and size) for all clients
+    ############################################################################
+    config = ConfigParser()
+    with open(config_file_path) as f:
+        config.read_file(f)
+    return config['API_CREDENTIALS']['ID'], config['API_CREDENTIALS']['API_KEY']
+
+
+def _load_api_credentials(config_file_path):
+    stat = os.stat(config_file_path)
+    return _read_api_credentials(os.path.abspath(config_file_path), stat.st_mtime_ns, stat.st_size)
+
+
+def _query_pairs(request_query):
+    ############################################################################
+    # Flatten query dictionary into (key, value) pairs, list values repeat the
+    # key once per item in order
+    ############################################################################
+    pairs = []
+    for query, value in request_query.items():
+        if isinstance(value, (list, tuple)):
+            pairs.extend((query, query_val) for query_val in value)
+        else:
+            pairs.append((query, value))
+    return pairs
+
+
+def _build_url(url, request_query=None):
+    ############################################################################
+    # Append URL encoded query to url
+    ############################################################################
+    if not request_query:
+        return url
+    return url+'?'+urlencode(_query_pairs(request_query))
+
+
+def _split_query(request_query, max_length, base_length=0):
+    ############################################################################
+    # Split query whose url (a base url of base_length characters, '?' and the
+    # encoded query) exceeds max_length into several queries by dividing its
+    # longest list value into chunks. Every other value is repeated in each
+    # query. A single item longer than the limit is sent on its own
+    #
+    # Return value:
+    # > Datatype - list
+    # > list of query dictionaries, the original query if it fits
+    ############################################################################
+    max_length -= base_length + 1
+    lists = [query for query, value in request_query.items() if isinstance(value, (list, tuple))]
+    if not lists or len(urlencode(_query_pairs(request_query))) <= max_length:
+        return [request_query]
+    split_key = max(lists, key=lambda query: len(request_query[query]))
+    fixed = {query: value for query, value in request_query.items() if query != split_key}
+    fixed_length = len(urlencode(_query_pairs(fixed)))
+    key_length = len(quote_plus(str(split_key)))
+    queries = []
+    chunk = []
+    length = fixed_length
+    for value in request_query[split_key]:
+        item_length = key_length + 2 + len(quote_plus(str(value)))
+        if chunk and length + item_length > max_length:
+            queries.append(dict(fixed, **{split_key: chunk}))
+            chunk = []
+            length = fixed_length
+        chunk.append(value)
+        length += item_length
+    if chunk:
+        queries.append(dict(fixed, **{split_key: chunk}))
+    return queries
+
+
+def _write_file(chunks, save_as, digest=None):
+    ############################################################################
+    # Write chunks to a temporary file in the directory of save_as, renamed to
+    # save_as once complete and removed if writing fails
+    ############################################################################
+    temp_path = os.path.join(os.path.dirname(os.path.abspath(save_as)), '.'+os.path.basename(save_as)+'.'+uuid.uuid4().hex+'.part')
+    try:
+        with open(temp_path, 'xb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+                if digest is not None:
+                    digest.update(chunk)
+        os.replace(temp_path, save_as)
+    except BaseException:
+        # the temporary file is missing if it could not be created, report the original error
+        try:
+            os.unlink(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+class _ZipStream:
+    ############################################################################
+    # Reads a zip archive front to back from a stream of byte chunks, using
+    # the local header before each entry instead of the central directory at
+    # the end, so entries can be extracted while the archive is downloaded.
+    # Only a chunk and the entry being decompressed are held in memory.
+    # Stored and deflated entries are supported, with sizes in the local
+    # header or in a data descriptor after the data (zip64 included)
+    ############################################################################
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = bytearray()
+
+    def _fill(self, size):
+        while len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return False
+            self._buffer += chunk
+        return True
+
+    def _more(self):
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            raise zipfile.BadZipFile('Truncated zip archive')
+        self._buffer += chunk
+
+    def _take(self, size):
+        if not self._fill(size):
+            raise zipfile.BadZipFile('Truncated zip archive')
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def entries(self):
+        ########################################################################
+        # Yield tuple(entry name, iterator of entry content chunks) for every
+        # entry. Content must be consumed before the next entry is read,
+        # content left unread is skipped. Directory entries are not yielded
+        ########################################################################
+        while self._fill(4) and self._buffer[:4] == b'PK\x03\x04':
+            signature, version, flags, method, mod_time, mod_date, crc, compressed_size, size, name_length, extra_length = struct.unpack('<IHHHHHIIIHH', self._take(30))
+            name = self._take(name_length).decode('utf-8' if flags & 0x800 else 'cp437')
+            extra = self._take(extra_length)
+            zip64 = False
+            while len(extra) >= 4:
+                extra_id, extra_size = struct.unpack('<HH', extra[:4])
+                if extra_id == 0x0001:
+                    zip64 = True
+                    values = list(struct.unpack('<'+'Q'*(min(extra_size, 16)//8), extra[4:4+min(extra_size, 16)]))
+                    if size == 0xFFFFFFFF and values:
+                        size = values.pop(0)
+                    if compressed_size == 0xFFFFFFFF and values:
+                        compressed_size = values.pop(0)
+                extra = extra[4+extra_size:]
+            if flags & 0x1:
+                raise zipfile.BadZipFile(f'Encrypted zip entry {name}')
+            if method not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+                raise zipfile.BadZipFile(f'Unsupported compression method {method} of zip entry {name}')
+            content = self._content(name, method, compressed_size, crc, bool(flags & 0x8), zip64)
+            if not name.endswith('/'):
+                yield name, content
+            for chunk in content:
+                pass
+
+    def _content(self, name, method, compressed_size, crc, has_descriptor, zip64):
+        checksum = 0
+        if method == zipfile.ZIP_DEFLATED:
+            decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+            remaining = None if has_descriptor else compressed_size
+            while not decompressor.eof and remaining != 0:
+                if not self._buffer:
+                    self._more()
+                data = bytes(self._buffer if remaining is None else self._buffer[:remaining])
+                del self._buffer[:len(data)]
+                if remaining is not None:
+                    remaining -= len(data)
+                chunk = decompressor.decompress(data)
+                if decompressor.unused_data:
+                    self._buffer[:0] = decompressor.unused_data
+                if chunk:
+                    checksum = zlib.crc32(chunk, checksum)
+                    yield chunk
+            chunk = decompressor.flush()
+            if chunk:
+                checksum = zlib.crc32(chunk, checksum)
+                yield chunk
+            if has_descriptor:
+                crc = self._descriptor(zip64)[0]
+        elif not has_descriptor:
+            remaining = compressed_size
+            while remaining:
+                if not self._buffer:
+                    self._more()
+                chunk = bytes(self._buffer[:remaining])
+                del self._buffer[:len(chunk)]
+                remaining -= len(chunk)
+                checksum = zlib.crc32(chunk, checksum)
+                yield chunk
+        else:
+            # stored entry of unknown size ends at the data descriptor whose crc and size match the data before it
+            size = 0
+            descriptor_size = 24 if zip64 else 16
+            while True:
+                position = self._buffer.find(b'PK\x07\x08')
+                if position == -1:
+                    emit = max(len(self._buffer) - 3, 0)
+                elif not self._fill(position + descriptor_size):
+                    emit = position
+                else:
+                    crc, = struct.unpack('<I', self._buffer[position+4:position+8])
+                    stored_size = struct.unpack('<Q' if zip64 else '<I', self._buffer[position+8+(8 if zip64 else 4):position+8+(16 if zip64 else 8)])[0]
+                    candidate = zlib.crc32(self._buffer[:position], checksum)
+                    if candidate == crc and stored_size == size + position:
+                        chunk = bytes(self._buffer[:position])
+                        del self._buffer[:position + descriptor_size]
+                        if chunk:
+                            checksum = candidate
+                            yield chunk
+                        break
+                    emit = position + 1
+                if emit:
+                    chunk = bytes(self._buffer[:emit])
+                    del self._buffer[:emit]
+                    size += len(chunk)
+                    checksum = zlib.crc32(chunk, checksum)
+                    yield chunk
+                else:
+                    self._more()
+        if checksum != crc:
+            raise zipfile.BadZipFile(f'Bad CRC-32 of zip entry {name}')
+
+    def _descriptor(self, zip64):
+        # signature of the data descriptor is optional
+        if not self._fill(4):
+            raise zipfile.BadZipFile('Truncated zip archive')
+        if self._buffer[:4] == b'PK\x07\x08':
+            del self._buffer[:4]
+        return struct.unpack('<IQQ' if zip64 else '<III', self._take(20 if zip64 else 12))
+
+
+# text up to the next bracket of a JSON value, with complete strings skipped over
+_JSON_UNTIL_BRACKET = re.compile(r'(?:[^"\[\]{}]+|"[^"\\]*(?:\\.[^"\\]*)*")*', re.DOTALL)
+
+
+def _iter_json_array(chunks):
+    ############################################################################
+    # Yield items of a JSON array received as a sequence of byte chunks,
+    # decoding each item as soon as it is complete. The bracket depth of an
+    # array or object item continuing in later chunks is tracked as they
+    # arrive so the item is decoded once, and consumed text is dropped only
+    # once it is most of the buffer
+    ############################################################################
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    # start of the current item, end of its text scanned so far and the bracket depth there
+    position = 0
+    scanned = 0
+    depth = 0
+    started = False
+    chunks = iter(chunks)
+    while True:
+        if depth:
+            while depth:
+                scanned = _JSON_UNTIL_BRACKET.match(buffer, scanned).end()
+                # the end of the text or a string that continues in the next chunk
+                if scanned == len(buffer) or buffer[scanned] == '"':
+                    break
+                depth += 1 if buffer[scanned] in '[{' else -1
+                scanned += 1
+            if not depth:
+                item, position = decoder.raw_decode(buffer, position)
+                yield item
+                continue
+        else:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position < len(buffer):
+                if not started:
+                    if buffer[position] != '[':
+                        raise ValueError('Expected JSON array')
+                    started = True
+                    position += 1
+                    continue
+                if buffer[position] == ']':
+                    return
+                try:
+                    item, end = decoder.raw_decode(buffer, position)
+                except ValueError:
+                    if buffer[position] in '[{':
+                        # incomplete, the rest of the item is scanned as it arrives and decoded once
+                        depth = 1
+                        scanned = position + 1
+                        continue
+                else:
+                    # a number is only complete once a delimiter follows, it may continue in the next chunk
+                    if isinstance(item, (dict, list, str)) or (end < len(buffer) and buffer[end] in ' \t\r\n,]'):
+                        position = end
+                        yield item
+                        continue
+        chunk = next(chunks, None)
+        if chunk is None:
+            if buffer[position:].strip():
+                raise ValueError('Incomplete JSON array')
+            return
+        if position > len(buffer) // 2:
+            buffer = buffer[position:]
+            scanned -= position
+            position = 0
+        buffer += text_decoder.decode(chunk)
+
+
+def _parse_date(value):
+    ############################################################################
+    # Parse Smartcat ISO 8601 date ('2020-10-26T10:00:00.1234567Z') to an
+    # aware datetime, None if missing or malformed
+    ############################################################################
+    match = re.match(r'^(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})(?:\.(\d+))?(Z|[+-]\d{2}:\d{2})?$', value or '')
+    if match is None:
+        return None
+    parsed = datetime.datetime.strptime(match.group(1), '%Y-%m-%dT%H:%M:%S')
+    parsed = parsed.replace(microsecond=int((match.group(2) or '0')[:6].ljust(6, '0')))
+    timezone = datetime.timezone.utc
+    if match.group(3) not in (None, 'Z'):
+        offset = datetime.timedelta(hours=int(match.group(3)[1:3]), minutes=int(match.group(3)[4:6]))
+        timezone = datetime.timezone(offset if match.group(3)[0] == '+' else -offset)
+    return parsed.replace(tzinfo=timezone)
+
+
+class _Model:
+    ############################################################################
+    # Base of response models. Frequently used fields are kept in slots and
+    # any other field of the response in '_extra'. Fields can also be read
+    # with the Smartcat JSON key, e.g. document['pretranslateCompleted'], so
+    # code written against the raw dictionaries keeps working
+    ############################################################################
+    __slots__ = ('_extra',)
+    _fields = {}
+
+    @classmethod
+    def from_json(cls, data):
+        model = cls.__new__(cls)
+        for key, attribute in cls._fields.items():
+            setattr(model, attribute, data.get(key))
+        extra = {key: value for key, value in data.items() if key not in cls._fields}
+        model._extra = extra or None
+        return model
+
+    def __getitem__(self, key):
+        attribute = self._fields.get(key)
+        if attribute is not None:
+            return getattr(self, attribute)
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self._fields or (self._extra is not None and key in self._extra)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self):
+        data = dict(self._extra or {})
+        for key, attribute in self._fields.items():
+            value = getattr(self, attribute)
+            if isinstance(value, list):
+                value = [item.to_dict() if isinstance(item, _Model) else item for item in value]
+            data[key] = value.to_dict() if isinstance(value, _Model) else value
+        return data
+
+    def __repr__(self):
+        return f'{type(self).__name__}(id={getattr(self, "id", None)!r}, name={getattr(self, "name", None)!r})'
+
+
+class Document(_Model):
+    ############################################################################
+    # Document of a project, one per target language
+    ############################################################################
+    __slots__ = ('id', 'name', 'source_language', 'target_language', 'status', 'status_modification_date', 'pretranslate_completed', 'words_count')
+    _fields = {'id': 'id', 'name': 'name', 'sourceLanguage': 'source_language', 'targetLanguage': 'target_language', 'status': 'status', 'statusModificationDate': 'status_modification_date', 'pretranslateCompleted': 'pretranslate_completed', 'wordsCount': 'words_count'}
+
+    @property
+    def status_modified(self):
+        # status_modification_date as aware datetime, None if missing
+        return _parse_date(self.status_modification_date)
+
+
+class Project(_Model):
+    ############################################################################
+    # Project with its documents. Documents are converted to Document models
+    # only when first accessed, so walking many projects without looking at
+    # their documents stays cheap
+    ############################################################################
+    __slots__ = ('id', 'name', 'source_language', 'target_languages', 'status', 'creation_date', 'modification_date', '_documents', '_raw_documents')
+    _fields = {'id': 'id', 'name': 'name', 'sourceLanguage': 'source_language', 'targetLanguages': 'target_languages', 'status': 'status', 'creationDate': 'creation_date', 'modificationDate': 'modification_date', 'documents': 'documents'}
+
+    @classmethod
+    def from_json(cls, data):
+        model = cls.__new__(cls)
+        for key, attribute in cls._fields.items():
+            if key != 'documents':
+                setattr(model, attribute, data.get(key))
+        model._documents = None
+        model._raw_documents = data.get('documents') or []
+        extra = {key: value for key, value in data.items() if key not in cls._fields}
+        model._extra = extra or None
+        return model
+
+    @property
+    def created(self):
+        # creation_date as aware datetime, None if missing
+        return _parse_date(self.creation_date)
+
+    @property
+    def modified(self):
+        # modification_date as aware datetime, None if missing
+        return _parse_date(self.modification_date)
+
+    @property
+    def documents(self):
+        if self._documents is None:
+            self._documents = [doc if isinstance(doc, Document) else Document.from_json(doc) for doc in self._raw_documents]
+            self._raw_documents = None
+        return self._documents
+
+    def with_documents(self, documents):
+        # copy of the project with another document list
+        project = Project.__new__(Project)
+        for attribute in self.__slots__ + _Model.__slots__:
+            setattr(project, attribute, getattr(self, attribute))
+        project._documents = list(documents)
+        project._raw_documents = None
+        return project
+
+
+class Statistics(_Model):
+    ############################################################################
+    # Statistics of a document, one entry per target language. Entries are
+    # indexed by language on first access
+    ############################################################################
+    __slots__ = ('document_id', 'entries', '_by_language')
+    _fields = {'documentId': 'document_id', 'statistics': 'entries'}
+
+    @classmethod
+    def from_json(cls, data):
+        model = super().from_json(data)
+        model.entries = model.entries or []
+        model._by_language = None
+        return model
+
+    @property
+    def languages(self):
+        if self._by_language is None:
+            self._by_language = {entry.get('language', index): entry for index, entry in enumerate(self.entries)}
+        return self._by_language
+
+    def words(self, language=None):
+        # word count of the given target language, of the first one if not given
+        if language is None:
+            return self.entries[0]['words'] if self.entries else None
+        return self.languages[language]['words']
+
+    def __repr__(self):
+        return f'Statistics(document_id={self.document_id!r}, languages={list(self.languages)!r})'
+
+
+class ExportTask(_Model):
+    ############################################################################
+    # Export task created for document download, each task can be fetched once
+    ############################################################################
+    __slots__ = ('id', 'document_ids')
+    _fields = {'id': 'id', 'documentIds': 'document_ids'}
+
+    def __repr__(self):
+        return f'ExportTask(id={self.id!r}, document_ids={self.document_ids!r})'
+
+
+class _DocumentIndex:
+    ############################################################################
+    # Lookup tables over the documents of one project listing: document name
+    # to its copies (one per target language) and document id to document.
+    # Lists are replaced rather than mutated so readers never see partial updates
+    ############################################################################
+    def __init__(self, documents):
+        self.by_name = {}
+        self.by_id = {}
+        self.add(documents)
+
+    def add(self, documents):
+        for doc in documents:
+            self.by_id[doc.id] = doc
+            self.by_name[doc.name] = self.by_name.get(doc.name, []) + [doc]
+
+    def remove(self, document_ids):
+        for document_id in document_ids:
+            doc = self.by_id.pop(document_id, None)
+            if doc is None:
+                continue
+            remaining = [other for other in self.by_name.get(doc.name, []) if other.id != document_id]
+            if remaining:
+                self.by_name[doc.name] = remaining
+            else:
+                self.by_name.pop(doc.name, None)
+
+    def documents(self, document_name):
+        # document_name is the name Smartcat gave the document, see _document_key
+        return self.by_name.get(document_name, [])
+
+    def ids(self, document_name):
+        return [doc.id for doc in self.documents(document_name)]
+
+    def completed(self, document_name):
+        # None if the document is unknown, else True when all language copies are pretranslated
+        docs = self.documents(document_name)
+        if not docs:
+            return None
+        return all(doc.pretranslate_completed for doc in docs)
+
+
+class _ProjectCache:
+    ############################################################################
+    # Size bounded LRU cache of project listings, with their document index,
+    # keyed by project name. Entries expire 'ttl' seconds after they were stored.
+    # Every change of a project advances its generation, a listing fetched in
+    # an earlier generation is not stored over the changed entry
+    ############################################################################
+    def __init__(self, ttl, max_size):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._changes = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def generation(self, project_name):
+        with self._lock:
+            return self._epoch, self._changes.get(project_name, 0)
+
+    def lookup(self, project_name):
+        # tuple(project, document index) or None
+        with self._lock:
+            entry = self._entries.get(project_name)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self._entries.move_to_end(project_name)
+                self.hits += 1
+                return entry[1], entry[2]
+            if entry is not None:
+                del self._entries[project_name]
+            self.misses += 1
+            return None
+
+    def get(self, project_name):
+        entry = self.lookup(project_name)
+        return entry[0] if entry is not None else None
+
+    def put(self, project_name, project, generation=None):
+        # generation as returned by generation() before the listing was requested
+        index = _DocumentIndex(project.documents)
+        if self.max_size <= 0:
+            return project, index
+        with self._lock:
+            if generation is not None and generation != (self._epoch, self._changes.get(project_name, 0)):
+                return project, index
+            self._entries[project_name] = (time.monotonic(), project, index)
+            self._entries.move_to_end(project_name)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return project, index
+
+    def update_documents(self, project_name, added=(), removed_ids=()):
+        # apply document changes to a cached listing instead of dropping it
+        with self._lock:
+            self._changes[project_name] = self._changes.get(project_name, 0) + 1
+            entry = self._entries.get(project_name)
+            if entry is None:
+                return False
+            stored, project, index = entry
+            removed_ids = set(removed_ids)
+            documents = [doc for doc in project.documents if doc.id not in removed_ids] + list(added)
+            index.remove(removed_ids)
+            index.add(added)
+            self._entries[project_name] = (stored, project.with_documents(documents), index)
+            return True
+
+    def invalidate(self, project_name=None):
+        with self._lock:
+            if project_name is None:
+                self._epoch += 1
+                self._entries.clear()
+            else:
+                self._changes[project_name] = self._changes.get(project_name, 0) + 1
+                self._entries.pop(project_name, None)
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
+
+
+class _MultipartFileStream:
+    ############################################################################
+    # File-like multipart/form-data body with a single file part. The file is
+    # read from disk as the body is sent, so it is never held in memory
+    ############################################################################
+    def __init__(self, file_path, field_name='', content_type='application/octet-stream', progress=None):
+        boundary = uuid.uuid4().hex
+        filename = os.path.basename(file_path).replace('\\', '\\\\').replace('"', '%22')
+        head = f'--{boundary}\r\nContent-Disposition: form-data; name="{field_name}"; filename="{filename}"\r\nContent-Type: {content_type}\r\n\r\n'.encode('utf-8')
+        tail = f'\r\n--{boundary}--\r\n'.encode('utf-8')
+        self.content_type = 'multipart/form-data; boundary='+boundary
+        self.file_path = file_path
+        self._file = open(file_path, 'rb')
+        self._file_size = os.fstat(self._file.fileno()).st_size
+        self._length = len(head) + self._file_size + len(tail)
+        self._parts = [io.BytesIO(head), self._file, io.BytesIO(tail)]
+        self._current = 0
+        self._progress = progress
+        self._sent = 0
+
+    def __len__(self):
+        return self._length
+
+    def read(self, size=-1):
+        chunks = []
+        while self._current < len(self._parts) and size != 0:
+            chunk = self._parts[self._current].read(size)
+            if not chunk:
+                self._current += 1
+                continue
+            chunks.append(chunk)
+            if self._parts[self._current] is self._file and self._progress is not None:
+                self._sent += len(chunk)
+                self._progress(self.file_path, self._sent, self._file_size)
+            if size > 0:
+                size -= len(chunk)
+        return b''.join(chunks)
+
+    def rewind(self):
+        for part in self._parts:
+            part.seek(0)
+        self._current = 0
+        self._sent = 0
+
+    def close(self):
+        self._file.close()
+
+
+class _UploadState:
+    ############################################################################
+    # Upload progress of files per project persisted to a JSON state file, so
+    # an interrupted batch can skip files already uploaded. A file counts as
+    # uploaded only while its size and modification time are unchanged
+    ############################################################################
+    def __init__(self, state_file):
+        self.state_file = state_file
+        self._lock = threading.Lock()
+        self._state = {}
+        if os.path.isfile(state_file):
+            with open(state_file) as f:
+                self._state = json.load(f)
+
+    def _file_key(self, file_path):
+        stat = os.stat(file_path)
+        return os.path.abspath(file_path), stat.st_size, stat.st_mtime
+
+    def is_uploaded(self, project_name, file_path):
+        path, size, mtime = self._file_key(file_path)
+        with self._lock:
+            entry = self._state.get(project_name, {}).get(path)
+        return entry is not None and entry['status'] == 'uploaded' and entry['size'] == size and entry['mtime'] == mtime
+
+    def record(self, project_name, file_path, uploaded, error=None):
+        path, size, mtime = self._file_key(file_path)
+        with self._lock:
+            self._state.setdefault(project_name, {})[path] = {'status': 'uploaded' if uploaded else 'failed', 'size': size, 'mtime': mtime, 'error': error}
+            temp_path = self.state_file+'.'+uuid.uuid4().hex+'.part'
+            with open(temp_path, 'w') as f:
+                json.dump(self._state, f, indent=1)
+            os.replace(temp_path, self.state_file)
+
+
+class _SyncManifest:
+    ############################################################################
+    # Content hash, size and modification time of every file synced to a
+    # project, with the ids of the documents created from it and the revision
+    # of each translation downloaded, persisted to a JSON manifest file
+    ############################################################################
+    def __init__(self, manifest_file):
+        self.manifest_file = manifest_file
+        self._state = {}
+        if os.path.isfile(manifest_file):
+            with open(manifest_file) as f:
+                self._state = json.load(f)
+
+    def files(self, project_name):
+        return self._state.setdefault(project_name, {})
+
+    def save(self):
+        temp_path = self.manifest_file+'.'+uuid.uuid4().hex+'.part'
+        with open(temp_path, 'w') as f:
+            json.dump(self._state, f, indent=1, sort_keys=True)
+        os.replace(temp_path, self.manifest_file)
+
+
+class _TranslationCache:
+    ############################################################################
+    # Directory of downloaded translations keyed by document id and revision.
+    # Only the latest revision of a document is kept and the least recently
+    # used files are evicted once the directory grows above 'max_size' bytes.
+    # Sizes and use order are kept in memory, the directory is only scanned
+    # when the cache is opened
+    ############################################################################
+    revision_fields = ('statusModificationDate', 'status', 'pretranslateCompleted', 'wordsCount', 'workflowStages')
+
+    def __init__(self, directory, max_size):
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._paths = {}
+        self._size = 0
+        os.makedirs(directory, exist_ok=True)
+        found = []
+        for entry in os.scandir(directory):
+            if entry.is_file() and not entry.name.endswith('.part'):
+                stat = entry.stat()
+                found.append((stat.st_mtime, entry.path, stat.st_size))
+        with self._lock:
+            for mtime, path, size in sorted(found):
+                self._add(path, size)
+            self._evict()
+
+    @classmethod
+    def revision(cls, doc):
+        # marker of the document state in a project listing, changes whenever the translation can have changed
+        marker = json.dumps([doc.get(field) for field in cls.revision_fields], sort_keys=True, default=str)
+        return hashlib.sha1(marker.encode('utf-8')).hexdigest()[:16]
+
+    def _path(self, document_id, revision):
+        return os.path.join(self.directory, hashlib.sha1(document_id.encode('utf-8')).hexdigest()+'_'+revision)
+
+    def get(self, document_id, revision, save_as):
+        # copy cached translation to save_as, False if not cached
+        path = self._path(document_id, revision)
+        try:
+            temp_path = os.path.join(os.path.dirname(os.path.abspath(save_as)), '.'+os.path.basename(save_as)+'.'+uuid.uuid4().hex+'.part')
+            shutil.copyfile(path, temp_path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return False
+        os.replace(temp_path, save_as)
+        with self._lock:
+            self.hits += 1
+            if path in self._entries:
+                self._entries.move_to_end(path)
+        try:
+            # keep the use order for the next time the cache is opened, the file may have been evicted meanwhile
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return True
+
+    def put(self, document_id, revision, source_path):
+        path = self._path(document_id, revision)
+        temp_path = path+'.'+uuid.uuid4().hex+'.part'
+        shutil.copyfile(source_path, temp_path)
+        size = os.path.getsize(temp_path)
+        os.replace(temp_path, path)
+        with self._lock:
+            self._add(path, size)
+            self._evict()
+
+    def _add(self, path, size):
+        # record a cached file, dropping the other revision of its document
+        key = os.path.basename(path).rsplit('_', 1)[0]
+        stale_path = self._paths.get(key)
+        if stale_path is not None and stale_path != path:
+            self._discard(stale_path)
+        if path in self._entries:
+            self._size -= self._entries.pop(path)
+        self._entries[path] = size
+        self._size += size
+        self._paths[key] = path
+
+    def _discard(self, path):
+        self._size -= self._entries.pop(path, 0)
+        key = os.path.basename(path).rsplit('_', 1)[0]
+        if self._paths.get(key) == path:
+            del self._paths[key]
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        while self._size > self.max_size and self._entries:
+            self._discard(next(iter(self._entries)))
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+
+class _RetryPolicy:
+    ############################################################################
+    # Decide whether a failed request is retried and how long to wait before
+    # the next attempt: exponential backoff with full jitter, or the delay
+    # requested by the server through the Retry-After header
+    ############################################################################
+    retry_status_codes = (429, 500, 502, 503, 504)
+    idempotent_methods = ('GET', 'DELETE')
+
+    def __init__(self, max_retries, backoff_factor, backoff_max, connect_errors=(requests.exceptions.ConnectTimeout,)):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.connect_errors = connect_errors
+
+    def should_retry(self, method, attempt, status_code=None, error=None, idempotent=False):
+        if attempt >= self.max_retries:
+            return False
+        idempotent = idempotent or method in self.idempotent_methods
+        if error is not None:
+            # a request that never reached the server can always be repeated
+            return idempotent or isinstance(error, self.connect_errors)
+        if status_code == 429:
+            return True
+        return idempotent and status_code in self.retry_status_codes
+
+    def delay(self, attempt, headers=None):
+        retry_after = headers.get('Retry-After') if headers else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                try:
+                    return min(max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0), self.backoff_max)
+                except (TypeError, ValueError):
+                    pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_factor * (2 ** attempt)))
+
+
+class _TokenBucket:
+    ############################################################################
+    # Client side rate limiter allowing 'rate' requests per second on average
+    # with bursts of up to 'capacity' requests
+    ############################################################################
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity else max(rate, 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        # take a token and return seconds the caller has to wait before using it
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+
+class _RequestMetrics:
+    ############################################################################
+    # In-process aggregation of request events per method and endpoint:
+    # counters, status codes, transferred bytes and a cumulative latency
+    # histogram with fixed bucket bounds in seconds
+    ############################################################################
+    latency_buckets = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, float('inf'))
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, event):
+        key = event['method']+' '+event['endpoint']
+        with self._lock:
+            metrics = self._endpoints.get(key)
+            if metrics is None:
+                metrics = {'count': 0, 'errors': 0, 'retries': 0, 'latency_total': 0.0, 'latency_max': 0.0, 'bytes_in': 0, 'bytes_out': 0, 'status_codes': {}, 'latency_histogram': dict.fromkeys(self.latency_buckets, 0)}
+                self._endpoints[key] = metrics
+            metrics['count'] += 1
+            metrics['retries'] += event['retries']
+            metrics['latency_total'] += event['latency']
+            metrics['latency_max'] = max(metrics['latency_max'], event['latency'])
+            metrics['bytes_in'] += event['bytes_in']
+            metrics['bytes_out'] += event['bytes_out']
+            if event['status_code'] is None or event['status_code'] >= 400:
+                metrics['errors'] += 1
+            metrics['status_codes'][event['status_code']] = metrics['status_codes'].get(event['status_code'], 0) + 1
+            for bound in self.latency_buckets:
+                if event['latency'] <= bound:
+                    metrics['latency_histogram'][bound] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {key: dict(metrics, status_codes=dict(metrics['status_codes']), latency_histogram=dict(metrics['latency_histogram'])) for key, metrics in self._endpoints.items()}
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+
+
+class _SingleFlight:
+    ############################################################################
+    # Coalesces concurrent identical calls: the first caller of a key runs the
+    # function, callers arriving while it is in flight wait for and share its
+    # result (or exception). Counts executed and coalesced calls per endpoint
+    ############################################################################
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._endpoints = {}
+
+    def _count(self, endpoint, counter):
+        counts = self._endpoints.get(endpoint)
+        if counts is None:
+            counts = self._endpoints[endpoint] = {'executed': 0, 'coalesced': 0}
+        counts[counter] += 1
+
+    def do(self, key, endpoint, function):
+        with self._lock:
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = {'done': threading.Event(), 'result': None, 'error': None}
+            self._count(endpoint, 'executed' if leader else 'coalesced')
+        if not leader:
+            call['done'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return call['result']
+        try:
+            call['result'] = function()
+        except BaseException as err:
+            call['error'] = err
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            call['done'].set()
+        return call['result']
+
+    def stats(self):
+        with self._lock:
+            endpoints = {endpoint: dict(counts) for endpoint, counts in self._endpoints.items()}
+        return {'executed': sum(counts['executed'] for counts in endpoints.values()), 'coalesced': sum(counts['coalesced'] for counts in endpoints.values()), 'endpoints': endpoints}
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+
 
 class Smartcat:
-    def __init__(self, ):
+    ############################################################################
+    # One instance can be shared by any number of threads without locking:
+    # configuration and credentials are set when the client is created (or by
+    # load_api_credentails) and only replaced as a whole, never mutated in
+    # place, and the caches, rate limiter and metrics guard their own state
+    ############################################################################
+    def __init__(self, pool_connections=10, pool_maxsize=10, timeout=(10, 300), cache_ttl=60, cache_size=128, max_retries=3, backoff_factor=0.5, backoff_max=60, rate_limit=None, rate_burst=None, server_url=None, translation_cache_dir=None, translation_cache_size=1024**3, max_url_length=2048, api_login_id=None, api_key=None, config_file_path=None, coalesce_requests=True):
+        ########################################################################
+        # Args:
+        # pool_connections:
+        #     > Datatype - integer
+        #     > number of per-host connection pools to cache
+        # pool_maxsize:
+        #     > Datatype - integer
+        #     > maximum number of keep-alive connections kept per host
+        # timeout:
+        #     > Datatype - number or tuple(connect timeout, read timeout)
+        #     > timeout in seconds applied to every request
+        # cache_ttl:
+        #     > Datatype - number
+        #     > seconds a cached project listing stays valid, 0 disables the cache
+        # cache_size:
+        #     > Datatype - integer
+        #     > maximum number of project listings kept in the cache
+        # max_retries:
+        #     > Datatype - integer
+        #     > number of times a throttled or failed request is retried, 0 disables retries
+        # backoff_factor:
+        #     > Datatype - number
+        #     > base delay in seconds of the exponential backoff between retries
+        # backoff_max:
+        #     > Datatype - number
+        #     > maximum delay in seconds between retries
+        # rate_limit:
+        #     > Datatype - number
+        #     > maximum average number of requests per second, None for no limit
+        # rate_burst:
+        #     > Datatype - integer
+        #     > number of requests allowed in a burst above rate_limit
+        # server_url:
+        #     > Datatype - string
+        #     > Smartcat server to use instead of https://smartcat.ai, e.g. regional server or local mock server
+        # translation_cache_dir:
+        #     > Datatype - string
+        #     > directory caching downloaded translations between runs, None disables the cache
+        # translation_cache_size:
+        #     > Datatype - integer
+        #     > maximum size in bytes of the translation cache directory
+        # max_url_length:
+        #     > Datatype - integer
+        #     > maximum length of a request url, longer id lists are split into several requests
+        # api_login_id, api_key:
+        #     > Datatype - string
+        #     > API credentials to use instead of loading them from the config file
+        # config_file_path:
+        #     > Datatype - string
+        #     > config file containing API credentials, loaded now and by load_api_credentails;
+        #       defaults to the class attribute Smartcat._config_file_path
+        # coalesce_requests:
+        #     > Datatype - boolean
+        #     > concurrent identical GET requests share one request and its response
+        ########################################################################
+        assert isinstance(pool_connections, int), "'pool_connections' should be of type 'int'"
+        assert isinstance(pool_maxsize, int), "'pool_maxsize' should be of type 'int'"
+        assert isinstance(cache_size, int), "'cache_size' should be of type 'int'"
+        assert isinstance(max_retries, int), "'max_retries' should be of type 'int'"
+        assert isinstance(max_url_length, int), "'max_url_length' should be of type 'int'"
         self.authorization_header = None
+        self.max_url_length = max_url_length
         self.debug = False
+        self.timeout = timeout
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+        self._project_cache = _ProjectCache(cache_ttl, cache_size)
+        self._retry_policy = _RetryPolicy(max_retries, backoff_factor, backoff_max)
+        self._rate_limiter = _TokenBucket(rate_limit, rate_burst) if rate_limit else None
+        self._request_metrics = _RequestMetrics()
+        self._single_flight = _SingleFlight() if coalesce_requests else None
+        self._request_hooks = ()
+        self._hooks_lock = threading.Lock()
+        if server_url != None:
+            assert isinstance(server_url, str), "'server_url' should be of type 'str'"
+            self._smartcat_url = {key: server_url.rstrip('/')+url[len(self._smartcat_server):] for key, url in self._smartcat_url.items()}
+        self._translation_cache = _TranslationCache(translation_cache_dir, translation_cache_size) if translation_cache_dir != None else None
+        if config_file_path != None:
+            assert isinstance(config_file_path, str), "'config_file_path' should be of type 'str'"
+            self._config_file_path = config_file_path
+        if api_login_id != None or api_key != None:
+            self.authorization_header = {'Authorization': self.encode_authorization_data(api_login_id, api_key)}
+        elif config_file_path != None:
+            self.load_api_credentails()
 
+    def __enter__(self):
+        return self
 
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def close(self):
+        ########################################################################
+        # Close pooled connections held by the client
+        #
+        # Return value:
+        # > None
+        ########################################################################
+        self._session.close()
+
+    def get_cache_stats(self):
+        ########################################################################
+        # Get project metadata cache statistics
+        #
+        # Return value:
+        # > Datatype - dictionary
+        # > number of cache hits, misses and cached projects, with hits and
+        #   misses of the translation cache under 'translations' if enabled
+        ########################################################################
+        stats = self._project_cache.stats()
+        if self._translation_cache is not None:
+            stats['translations'] = self._translation_cache.stats()
+        return stats
+
+    def invalidate_project_cache(self, project_name=None):
+        ########################################################################
+        # Drop cached metadata of a project, or of all projects if no name given
+        #
+        # Args:
+        # project_name:
+        #     > Datatype - string
+        #     > name of the project to drop from cache
+        #
+        # Return value:
+        # > None
+        ########################################################################
+        self._project_cache.invalidate(project_name)
+
+    def add_request_hook(self, hook):
+        ########################################################################
+        # Register function called after every request with a dictionary of
+        # method, endpoint (key of _smartcat_url), url, status_code (None if
+        # request raised), latency (seconds including retries), bytes_in,
+        # bytes_out, retries and error
+        #
+        # Args:
+        # hook:
+        #     > Datatype - callable
+        #     > function taking the request event dictionary
+        #
+        # Return value:
+        # > None
+        ########################################################################
+        assert callable(hook), "'hook' should be callable"
+        # hooks are replaced rather than mutated so requests in flight iterate a stable tuple
+        with self._hooks_lock:
+            self._request_hooks = self._request_hooks + (hook,)
+
+    def remove_request_hook(self, hook):
+        ########################################################################
+        # Unregister function added with add_request_hook
+        #
+        # Return value:
+        # > None
+        ########################################################################
+        with self._hooks_lock:
+            hooks = list(self._request_hooks)
+            hooks.remove(hook)
+            self._request_hooks = tuple(hooks)
+
+    def get_request_metrics(self):
+        ########################################################################
+        # Get request metrics aggregated per method and endpoint
+        #
+        # Return value:
+        # > Datatype - dictionary
+        # > dictionary keyed by 'METHOD endpoint' of count, errors, retries,
+        #   latency_total, latency_max, bytes_in, bytes_out, status_codes and
+        #   cumulative latency_histogram keyed by bucket upper bound in seconds
+        ########################################################################
+        return self._request_metrics.snapshot()
+
+    def reset_request_metrics(self):
+        ########################################################################
+        # Clear aggregated request metrics and coalescing counters
+        #
+        # Return value:
+        # > None
+        ########################################################################
+        self._request_metrics.reset()
+        if self._single_flight is not None:
+            self._single_flight.reset()
+
+    def get_coalescing_stats(self):
+        ########################################################################
+        # Get number of GET requests sent and of identical concurrent calls
+        # that shared them instead of sending their own, per endpoint
+        #
+        # Return value:
+        # > Datatype - dictionary
+        # > 'executed' and 'coalesced' totals and per endpoint counts in 'endpoints'
+        ########################################################################
+        if self._single_flight is None:
+            return {'executed': 0, 'coalesced': 0, 'endpoints': {}}
+        return self._single_flight.stats()
+
+
+    _smartcat_server = 'https://smartcat.ai'
     _smartcat_url = {
         'project_create': 'https://smartcat.ai/api/integration/v1/project/create',
         'project_list': 'https://smartcat.ai/api/integration/v1/project/list',
@@ -33,8 +1235,8 @@ class Smartcat:
     }
 
 
-    _config = ConfigParser()
     _config_file_path = '' # location of config file containing API credentials
+    _config_lock = threading.Lock()
 
     def set_debug(self, flag):
         ########################################################################
@@ -72,15 +1274,15 @@ class Smartcat:
         assert isinstance(config_filename, str), "'config_filename' should be of type 'str'"
         assert isinstance(section, str), "'section' should be of type 'str'"
         assert isinstance(data, dict), "'data' should be of type 'dict'"
-        if not os.path.isfile(config_filename):
-            self._config.write(open(config_filename,'w+'))
-        else:
-            self._config.read(config_filename)
-        if section not in self._config.sections():
-            self._config.add_section(section)
-        self._config[section] = data
-        with open(config_filename,'w+') as config_file:
-            self._config.write(config_file)
+        with self._config_lock:
+            config = ConfigParser()
+            if os.path.isfile(config_filename):
+                config.read(config_filename)
+            config[section] = data
+            temp_path = config_filename+'.'+uuid.uuid4().hex+'.part'
+            with open(temp_path,'w+') as config_file:
+                config.write(config_file)
+            os.replace(temp_path, config_filename)
         return True
 
 
@@ -140,11 +1342,7 @@ class Smartcat:
         # > True if loaded successfully else False
         ########################################################################
         try:
-            with open(self._config_file_path) as f:
-                pass
-            self._config.read(self._config_file_path)
-            api_login_id = self._config['API_CREDENTIALS']['ID']
-            api_key = self._config['API_CREDENTIALS']['API_KEY']
+            api_login_id, api_key = _load_api_credentials(self._config_file_path)
             self.authorization_header = {'Authorization':self.encode_authorization_data(api_login_id, api_key)}
             return True
         except Exception as err:
@@ -158,9 +1356,99 @@ class Smartcat:
 ################################################################################
 # API Requests
 
-    def get_request_smartcat(self, url, request_headers, request_data=None, request_query=None):
+    def endpoint_key(self, url):
+        ########################################################################
+        # Get key of _smartcat_url the url belongs to (longest matching url)
+        #
+        # Return value:
+        # > Datatype - string
+        # > endpoint key, 'other' if url does not match any endpoint
+        ########################################################################
+        endpoint, matched = 'other', ''
+        for key, endpoint_url in self._smartcat_url.items():
+            if url.startswith(endpoint_url) and len(endpoint_url) > len(matched):
+                endpoint, matched = key, endpoint_url
+        return endpoint
+
+    def _emit_request_event(self, event):
+        self._request_metrics.record(event)
+        for hook in self._request_hooks:
+            try:
+                hook(event)
+            except Exception as err:
+                print(f'[Smartcat API:request_hook]Exception: {err}')
+
+    def _request_event(self, method, url, started, attempt, resp=None, error=None, stream=False):
+        bytes_out = bytes_in = 0
+        status_code = None
+        if resp is not None:
+            status_code = resp.status_code
+            body = resp.request.body if resp.request is not None else None
+            if body is not None and hasattr(body, '__len__'):
+                bytes_out = len(body)
+            if not stream:
+                bytes_in = len(resp.content)
+            elif resp.headers.get('Content-Length', '').isdigit():
+                bytes_in = int(resp.headers['Content-Length'])
+        return {'method': method, 'endpoint': self.endpoint_key(url), 'url': url, 'status_code': status_code, 'latency': time.perf_counter() - started, 'bytes_in': bytes_in, 'bytes_out': bytes_out, 'retries': attempt, 'error': error}
+
+    def send_request(self, method, url, idempotent=False, **kwargs):
+        ########################################################################
+        # Send request through the pooled session, waiting for the rate limiter
+        # and retrying throttled or failed requests according to retry policy.
+        # POST requests are only retried when they were not processed by the
+        # server (throttled or connection never established) unless idempotent
+        #
+        # Args:
+        # method:
+        #     > Datatype - string
+        #     > 'GET', 'POST' or 'DELETE'
+        # url:
+        #     > Datatype - string
+        #     > url to make request to
+        # idempotent:
+        #     > Datatype - boolean
+        #     > request may be repeated safely even if it reached the server
+        # kwargs:
+        #     > arguments passed on to requests
+        #
+        # Return value:
+        # > Datatype - requests.models.Response
+        # > ressponse received
+        ########################################################################
+        attempt = 0
+        started = time.perf_counter()
+        while True:
+            if self._rate_limiter is not None:
+                self._rate_limiter.acquire()
+            body = kwargs.get('data')
+            if attempt > 0 and hasattr(body, 'rewind'):
+                body.rewind()
+            try:
+                resp = self._session.request(method, url, timeout=self.timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as err:
+                if not self._retry_policy.should_retry(method, attempt, error=err, idempotent=idempotent):
+                    self._emit_request_event(self._request_event(method, url, started, attempt, error=str(err)))
+                    raise
+                delay = self._retry_policy.delay(attempt)
+                if self.debug:
+                    print(f'[Smartcat API:{method}]Retry {attempt+1} in {delay:.2f}s after exception: {err}')
+            else:
+                if not self._retry_policy.should_retry(method, attempt, status_code=resp.status_code, idempotent=idempotent):
+                    self._emit_request_event(self._request_event(method, url, started, attempt, resp=resp, stream=kwargs.get('stream', False)))
+                    return resp
+                delay = self._retry_policy.delay(attempt, resp.headers)
+                if self.debug:
+                    print(f'[Smartcat API:{method}]Retry {attempt+1} in {delay:.2f}s after response code: {resp.status_code}')
+                resp.close()
+            time.sleep(delay)
+            attempt += 1
+
+
+    def get_request_smartcat(self, url, request_headers, request_data=None, request_query=None, stream=False):
         ########################################################################
-        # GET request to smartcat API
+        # GET request to smartcat API. Identical requests made concurrently by
+        # other threads share a single request and response unless streamed
         #
         # Args:
         # url:
@@ -175,6 +1463,9 @@ class Smartcat:
         # request_query:
         #     > Datatype - dictionary
         #     > query data to encode in url
+        # stream:
+        #     > Datatype - boolean
+        #     > defer reading response body until it is iterated
         #
         # Return value:
         # > Datatype - requests.models.Response
@@ -188,33 +1479,20 @@ class Smartcat:
             form_data = {'':('',request_data,'application/json')}
         if(request_query != None):
             assert isinstance(request_query, dict), "'request_query' should be of type 'dict'"
-            q = ''
-            for query in request_query.keys():
-                if (query != list(request_query.keys())[-1]):
-                    if isinstance(request_query[query], list):
-                        for query_val in request_query[query]:
-                            q += query+'='+query_val+'&'
-                    else:
-                        q += query+'='+request_query[query]+'&'
-                else:
-                    if isinstance(request_query[query], list):
-                        for query_val in request_query[query]:
-                            if(query_val != request_query[query][-1]):
-                                q += query+'='+query_val+'&'
-                            else:
-                                q += query+'='+query_val
-                    else:
-                        q += query+'='+request_query[query]
-            url = url+'?'+q
+            url = _build_url(url, request_query)
         if self.debug:
             print(f'[Smartcat API:GET]Request URL: {url}')
             print(f'[Smartcat API:GET]Request payload: {form_data}')
             print(f'[Smartcat API:GET]Request Query: {request_query}')
         # print(f'[GET]Request headers: {request_headers}')
-        return requests.request('GET', url, files=form_data, headers=request_headers)
+        if self._single_flight is None or stream:
+            return self.send_request('GET', url, files=form_data, headers=request_headers, stream=stream)
+        # the body of a response that is not streamed is read before it is shared, so every caller can parse it
+        key = (url, request_data, tuple(sorted(request_headers.items())))
+        return self._single_flight.do(key, self.endpoint_key(url), lambda: self.send_request('GET', url, files=form_data, headers=request_headers))
 
 
-    def post_request_smartcat(self, url, request_headers, request_data=None, upload_file=None):
+    def post_request_smartcat(self, url, request_headers, request_data=None, upload_file=None, idempotent=False, progress=None):
         ########################################################################
         # POST request to smartcat API
         #
@@ -228,9 +1506,15 @@ class Smartcat:
         # request_data:
         #     > Datatype - string
         #     > request payload in JSON format
-        # request_query:
-        #     > Datatype - dictionary
-        #     > query data to encode in url
+        # upload_file:
+        #     > Datatype - string
+        #     > path of file to upload, streamed from disk as multipart body
+        # idempotent:
+        #     > Datatype - boolean
+        #     > request may be retried even after it reached the server
+        # progress:
+        #     > Datatype - callable
+        #     > called with (file path, bytes sent, file size) as upload_file is sent
         #
         # Return value:
         # > Datatype - requests.models.Response
@@ -242,15 +1526,21 @@ class Smartcat:
         assert isinstance(request_headers, dict), "'request_headers' should be of type 'dict'"
         if upload_file == None: 
             form_data = {'':('',request_data,'application/json')}
-        else:
             if self.debug:
-                print(f'[Smartcat API:POST]Upload Filename: {os.path.splitext(os.path.basename(upload_file))[0]}')
-            form_data = {'':(os.path.basename(upload_file), open(upload_file, 'rb'),'application/octet-stream')}
+                print(f'[Smartcat API:POST]Request URL: {url}')
+                print(f'[Smartcat API:POST]Request payload: {form_data}')
+                print(f'[Smartcat API:POST]Request headers: {request_headers}')
+            return self.send_request('POST', url, idempotent=idempotent, files=form_data, headers=request_headers)
         if self.debug:
+            print(f'[Smartcat API:POST]Upload Filename: {os.path.splitext(os.path.basename(upload_file))[0]}')
             print(f'[Smartcat API:POST]Request URL: {url}')
-            print(f'[Smartcat API:POST]Request payload: {form_data}')
             print(f'[Smartcat API:POST]Request headers: {request_headers}')
-        return requests.request('POST', url, files=form_data, headers=request_headers)
+        body = _MultipartFileStream(upload_file, progress=progress)
+        try:
+            headers = dict(request_headers, **{'Content-Type': body.content_type})
+            return self.send_request('POST', url, idempotent=idempotent, data=body, headers=headers)
+        finally:
+            body.close()
 
     def delete_request_smartcat(self, url, request_headers, project_id=None, request_query=None):
         ########################################################################
@@ -281,28 +1571,70 @@ class Smartcat:
             url = url+'/'+project_id
         if (request_query != None):
             assert isinstance(request_query, dict), "'request_query' should be of type 'dict'"
-            q = ''
-            for query in request_query.keys():
-                if (query != list(request_query.keys())[-1]):
-                    if isinstance(request_query[query], list):
-                        for query_val in request_query[query]:
-                            q += query+'='+query_val+'&'
-                    else:
-                        q += query+'='+request_query[query]+'&'
-                else:
-                    if isinstance(request_query[query], list):
-                        for query_val in request_query[query]:
-                            if(query_val != request_query[query][-1]):
-                                q += query+'='+query_val+'&'
-                            else:
-                                q += query+'='+query_val
-                    else:
-                        q += query+'='+request_query[query]
-            url = url+'?'+q
+            url = _build_url(url, request_query)
         if self.debug:
             print(f'[Smartcat API:DELETE]Request URL: {url}')
             print(f'[Smartcat API:DELETE]Request headers: {request_headers}')
-        return requests.request('DELETE', url, files={'':''}, headers=request_headers)
+        return self.send_request('DELETE', url, files={'':''}, headers=request_headers)
+
+    def split_request_query(self, request_query, url=''):
+        ########################################################################
+        # Split query into queries whose url stays within max_url_length,
+        # dividing its longest list value (e.g. documentIds)
+        #
+        # Args:
+        # request_query:
+        #     > Datatype - dictionary
+        #     > query data to encode in url
+        # url:
+        #     > Datatype - string
+        #     > url the query is appended to
+        #
+        # Return value:
+        # > Datatype - list
+        # > list of query dictionaries
+        ########################################################################
+        assert isinstance(request_query, dict), "'request_query' should be of type 'dict'"
+        return _split_query(request_query, self.max_url_length, len(url))
+
+    def batch_request_smartcat(self, method, url, request_headers, request_query, max_workers=8):
+        ########################################################################
+        # GET or DELETE request with a query too long for one url, sent as
+        # several requests (see split_request_query) in parallel
+        #
+        # Args:
+        # method:
+        #     > Datatype - string
+        #     > 'GET' or 'DELETE'
+        # url:
+        #     > Datatype - string
+        #     > url to make request to
+        # request_headers:
+        #     > Datatype - dictionary
+        #     > request headers - authorization header
+        # request_query:
+        #     > Datatype - dictionary
+        #     > query data to encode in url
+        # max_workers:
+        #     > Datatype - integer
+        #     > maximum number of requests sent at once
+        #
+        # Return value:
+        # > Datatype - list
+        # > list of (query, requests.models.Response) in query order
+        ########################################################################
+        assert method in ('GET', 'DELETE'), "'method' should be 'GET' or 'DELETE'"
+        queries = self.split_request_query(request_query, url)
+        if self.debug:
+            print(f'[Smartcat API:{method}]Query split into {len(queries)} request(s)')
+        if method == 'GET':
+            send = lambda query: self.get_request_smartcat(url, request_headers, request_query=query)
+        else:
+            send = lambda query: self.delete_request_smartcat(url, request_headers, request_query=query)
+        if len(queries) == 1:
+            return [(queries[0], send(queries[0]))]
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(queries)))) as executor:
+            return list(zip(queries, executor.map(send, queries)))
 
     def make_response(self, response):
         ########################################################################
@@ -314,14 +1646,52 @@ class Smartcat:
         #     > response of https resquest
         
         # Return value:
-        # > Datatype - dictionary
-        # > dictionary of response code and content
+        # > Datatype - dictionary
+        # > dictionary of response code and content
+        ########################################################################
+        try:
+            return {'response_code':response.status_code, 'response':response.json()}
+        except Exception as err:
+            print(f'[Smartcat API:make_response]Exception: {err}')
+            return {'response_code':response.status_code, 'response':''}
+
+    def save_response(self, response, save_as, checksum=None, chunk_size=1024*1024):
+        ########################################################################
+        # Write response body to file in chunks. Body is written to a temporary
+        # file in the same directory which is renamed to 'save_as' once complete
+        #
+        # Args:
+        # response:
+        #     > Datatype - requests.models.Response
+        #     > response of https request made with stream=True
+        # save_as:
+        #     > Datatype - string
+        #     > filename with path to save response body as
+        # checksum:
+        #     > Datatype - string
+        #     > name of hashlib algorithm to compute over the body, e.g. 'sha256'
+        # chunk_size:
+        #     > Datatype - integer
+        #     > bytes read from the response at a time
+        #
+        # Return value:
+        # > Datatype - string
+        # > hex digest of the body if checksum is given else empty string
         ########################################################################
+        assert isinstance(save_as, str), "'save_as' should be of type 'string'"
+        digest = hashlib.new(checksum) if checksum != None else None
         try:
-            return {'response_code':response.status_code, 'response':response.json()}
-        except Exception as err:
-            print(f'[Smartcat API:make_response]Exception: {err}')
-            return {'response_code':response.status_code, 'response':''}
+            _write_file(response.iter_content(chunk_size=chunk_size), save_as, digest)
+        finally:
+            response.close()
+        return digest.hexdigest() if digest is not None else ''
+
+    def _file_digest(self, file_path, checksum):
+        digest = hashlib.new(checksum)
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024*1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
 
 
 ################################################################################
@@ -330,6 +1700,71 @@ class Smartcat:
 ################################################################################
 # API Operation Methods
 
+    def get_project(self, project_name, refresh=False):
+        ########################################################################
+        # Get project listing (id, documents and their status) of the project.
+        # Listings are served from the metadata cache while still valid
+        #
+        # Args:
+        # project_name:
+        #     > Datatype - string
+        #     > name of the project to be fetched
+        # refresh:
+        #     > Datatype - boolean
+        #     > bypass the cache and fetch a fresh listing
+        #
+        # Return value:
+        # > Datatype - Project
+        # > project as returned by Smartcat project list, its documents as Document models
+        # > IndexError is raised if the project does not exist and
+        #   requests.exceptions.HTTPError if the project list request fails
+        ########################################################################
+        return self._get_project_entry(project_name, refresh)[0]
+
+    def get_document_index(self, project_name, refresh=False):
+        ########################################################################
+        # Get index of project documents, built once per project listing
+        #
+        # Args:
+        # project_name:
+        #     > Datatype - string
+        #     > name of the project
+        # refresh:
+        #     > Datatype - boolean
+        #     > bypass the cache and fetch a fresh listing
+        #
+        # Return value:
+        # > Datatype - _DocumentIndex
+        # > 'by_name' maps document name to its documents (one per target language), 'by_id' maps id to document
+        ########################################################################
+        return self._get_project_entry(project_name, refresh)[1]
+
+    def _get_project_entry(self, project_name, refresh=False):
+        assert isinstance(project_name, str), "'project_name' should be of type 'string'"
+        entry = None if refresh else self._project_cache.lookup(project_name)
+        if entry is None:
+            # a listing requested before the project changed is neither cached nor shared with callers that came after the change
+            generation = self._project_cache.generation(project_name)
+            url = _build_url(self._smartcat_url['project_list'], {'projectName': project_name})
+            headers = self.authorization_header
+            fetch = lambda: self.send_request('GET', url, files={'':''}, headers=headers)
+            if self._single_flight is None:
+                resp = fetch()
+            else:
+                resp = self._single_flight.do((url, generation, tuple(sorted(headers.items()))), self.endpoint_key(url), fetch)
+            if resp.status_code != 200:
+                raise requests.exceptions.HTTPError(f'Project list failed with response code {resp.status_code}', response=resp)
+            projects = resp.json()
+            if not isinstance(projects, list) or not projects:
+                raise IndexError(f'Project not found: {project_name}')
+            # the listing matches names containing project_name, prefer the project named exactly so
+            project = Project.from_json(next((project for project in projects if project.get('name') == project_name), projects[0]))
+            entry = self._project_cache.put(project_name, project, generation)
+        elif self.debug:
+            print(f'[Smartcat API:get_project]Cache hit: {project_name}')
+        return entry
+
+
     def create_project(self, project_name, source_language, target_languages, pretranslate=True):
         ########################################################################
         # Create project in Smartcat workspace
@@ -350,25 +1785,20 @@ class Smartcat:
         #
         # Return value:
         # > Datatype - dictionary
-        # > dictionary of reponse code and response content containing project id and other information
+        # > dictionary of reponse code and response content, a Project if the project was created
         ########################################################################
         assert isinstance(project_name, str), "'project_name' should be of type 'string'"
         assert isinstance(source_language, str), "'source_language' should be of type 'string'"
         assert isinstance(target_languages, list), "'target_languages' should be of type 'list'"
         assert isinstance(pretranslate, bool), "'pretranslate' should be of type 'boolean'"
-        enable_pretranslation = 'true'
-        if pretranslate == False:
-            enable_pretranslation = 'false'
-        target_languages_str = '"'
-        for language in target_languages:
-            if target_languages[-1] == language:
-                target_languages_str = target_languages_str+language+'"'
-            else:
-                target_languages_str = target_languages_str+language+'","'
-        payload = f'{{"name":"{project_name}","sourceLanguage": "{source_language}","targetLanguages": [{target_languages_str}],"assignToVendor": false,"useMT": {enable_pretranslation},"pretranslate": {enable_pretranslation},"autoPropagateRepetitions": true}}'
+        payload = json.dumps({'name': project_name, 'sourceLanguage': source_language, 'targetLanguages': target_languages, 'assignToVendor': False, 'useMT': pretranslate, 'pretranslate': pretranslate, 'autoPropagateRepetitions': True})
         if self.debug:
             print(f'[Smartcat API:create_project]Request payload: {payload}')
-        return self.make_response(self.post_request_smartcat(self._smartcat_url['project_create'], self.authorization_header, request_data=payload))
+        resp = self.make_response(self.post_request_smartcat(self._smartcat_url['project_create'], self.authorization_header, request_data=payload))
+        if resp['response_code'] == 200 and isinstance(resp['response'], dict):
+            resp['response'] = Project.from_json(resp['response'])
+        self._project_cache.invalidate(project_name)
+        return resp
 
 
     def get_project_id(self, project_name):
@@ -387,7 +1817,79 @@ class Smartcat:
         assert isinstance(project_name, str), "'project_name' should be of type 'string'"
         if self.debug:
             print(f'[Smartcat API:get_project_id]Project Name: {project_name}')
-        return self.get_request_smartcat(self._smartcat_url['project_list'], self.authorization_header, request_query={'projectName':project_name}).json()[0]['id'] 
+        return self.get_project(project_name)['id']
+
+
+    def iter_projects(self, project_name=None, created_by_user_id=None, external_tag=None, client_ids=None, page_size=100, prefetch=True):
+        ########################################################################
+        # Iterate over all projects of the account page by page. Pages are
+        # parsed incrementally while they are received. Without prefetch
+        # projects are yielded as they are parsed; with prefetch the next page
+        # is received and parsed in the background while the current one is
+        # consumed, which holds up to two whole pages in memory
+        #
+        # Args:
+        # project_name:
+        #     > Datatype - string
+        #     > only projects whose name contains this text
+        # created_by_user_id:
+        #     > Datatype - string
+        #     > only projects created by this user
+        # external_tag:
+        #     > Datatype - string
+        #     > only projects with this external tag
+        # client_ids:
+        #     > Datatype - list
+        #     > only projects of these clients
+        # page_size:
+        #     > Datatype - integer
+        #     > number of projects requested per page
+        # prefetch:
+        #     > Datatype - boolean
+        #     > fetch the next page while the current one is consumed
+        #
+        # Return value:
+        # > Datatype - generator
+        # > yields Project models as returned by Smartcat project list
+        ########################################################################
+        assert isinstance(page_size, int) and page_size > 0, "'page_size' should be a positive 'int'"
+        request_query = {}
+        for query, value in (('projectName', project_name), ('createdByUserId', created_by_user_id), ('externalTag', external_tag), ('clientIds', client_ids)):
+            if value != None:
+                request_query[query] = value
+        if client_ids != None:
+            assert isinstance(client_ids, list), "'client_ids' should be of type 'list'"
+
+        def page(offset):
+            resp = self.get_request_smartcat(self._smartcat_url['project_list'], self.authorization_header, request_query=dict(request_query, offset=str(offset), limit=str(page_size)), stream=True)
+            try:
+                if resp.status_code != 200:
+                    raise requests.exceptions.HTTPError(f'Project list failed with response code {resp.status_code}', response=resp)
+                for project in _iter_json_array(resp.iter_content(chunk_size=64*1024)):
+                    yield Project.from_json(project)
+            finally:
+                resp.close()
+
+        offset = 0
+        if not prefetch:
+            while True:
+                count = 0
+                for project in page(offset):
+                    count += 1
+                    yield project
+                if count < page_size:
+                    return
+                offset += page_size
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            next_page = executor.submit(lambda start: list(page(start)), offset)
+            while True:
+                projects = next_page.result()
+                offset += page_size
+                if len(projects) < page_size:
+                    yield from projects
+                    return
+                next_page = executor.submit(lambda start: list(page(start)), offset)
+                yield from projects
 
 
 
@@ -410,13 +1912,98 @@ class Smartcat:
             print(f'[Smartcat API:delete_project]Project Name: {project_name}')
             print(f'[Smartcat API:delete_project]Project Id: {project_id}')
         resp = self.delete_request_smartcat(self._smartcat_url['project_general'], self.authorization_header, project_id=project_id)
+        self._project_cache.invalidate(project_name)
         if (resp.status_code == 204):
             return True
         else:
             return False
 
 
-    def upload_document(self, project_name, file_path):
+    def delete_projects(self, project_names=None, project_ids=None, predicate=None, name_prefix=None, older_than=None, max_workers=8):
+        ########################################################################
+        # Delete many projects. Projects selected by name, prefix, age or
+        # predicate are resolved with a single walk over the project list,
+        # then deleted in parallel (failed deletes are retried by the retry policy)
+        #
+        # Args:
+        # project_names:
+        #     > Datatype - list
+        #     > names of projects to delete
+        # project_ids:
+        #     > Datatype - list
+        #     > ids of projects to delete
+        # predicate:
+        #     > Datatype - callable
+        #     > function taking a Project, project is deleted if it returns True
+        # name_prefix:
+        #     > Datatype - string
+        #     > delete projects whose name starts with this prefix
+        # older_than:
+        #     > Datatype - number or datetime.timedelta
+        #     > delete projects not modified for this long (seconds if number)
+        # max_workers:
+        #     > Datatype - integer
+        #     > number of projects deleted in parallel
+        #
+        # Return value:
+        # > Datatype - dictionary
+        # > 'deleted': list of {'id', 'name'}, 'failed': list of {'id', 'name', 'error'}, 'not_found': list of project names.
+        #   Projects given by name or id are deleted along with those matching all of name_prefix, older_than and predicate
+        ########################################################################
+        assert project_names == None or isinstance(project_names, list), "'project_names' should be of type 'list'"
+        assert project_ids == None or isinstance(project_ids, list), "'project_ids' should be of type 'list'"
+        assert predicate == None or callable(predicate), "'predicate' should be callable"
+        assert isinstance(max_workers, int) and max_workers > 0, "'max_workers' should be a positive 'int'"
+        if isinstance(older_than, (int, float)):
+            older_than = datetime.timedelta(seconds=older_than)
+        selected = {project_id: None for project_id in (project_ids or [])}
+        wanted_names = set(project_names or [])
+        found_names = set()
+        now = datetime.datetime.now(datetime.timezone.utc)
+
+        def matches_filters(project):
+            # prefix, age and predicate filters all have to match
+            if name_prefix != None and not project.name.startswith(name_prefix):
+                return False
+            if older_than != None:
+                modified = project.modified or project.created
+                if modified == None or now - modified <= older_than:
+                    return False
+            return predicate == None or bool(predicate(project))
+
+        has_filters = predicate != None or name_prefix != None or older_than != None
+        if wanted_names or has_filters:
+            for project in self.iter_projects():
+                if project.name in wanted_names or (has_filters and matches_filters(project)):
+                    selected[project.id] = project.name
+                    found_names.add(project.name)
+        report = {'deleted': [], 'failed': [], 'not_found': sorted(wanted_names - found_names)}
+        if self.debug:
+            print(f'[Smartcat API:delete_projects]Projects to delete: {len(selected)}')
+
+        def delete(project_id):
+            try:
+                resp = self.delete_request_smartcat(self._smartcat_url['project_general'], self.authorization_header, project_id=project_id)
+                return None if resp.status_code == 204 else f'Response code {resp.status_code}'
+            except Exception as err:
+                print(f'[Smartcat API:delete_projects]Exception: {err}')
+                return str(err)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for (project_id, name), error in zip(selected.items(), executor.map(delete, selected.keys())):
+                if name != None:
+                    self._project_cache.invalidate(name)
+                if error == None:
+                    report['deleted'].append({'id': project_id, 'name': name})
+                else:
+                    report['failed'].append({'id': project_id, 'name': name, 'error': error})
+        if project_ids:
+            # names of projects given by id are unknown, drop all cached listings
+            self._project_cache.invalidate()
+        return report
+
+
+    def upload_document(self, project_name, file_path, progress=None):
         ########################################################################
         # Upload file to a project
         # 
@@ -424,6 +2011,12 @@ class Smartcat:
         # project_name:
         #   > Datatype - string
         #   > name of the eproject to which the file is to be uploaded
+        # file_path:
+        #   > Datatype - string
+        #   > path of the file to be uploaded
+        # progress:
+        #   > Datatype - callable
+        #   > called with (file path, bytes sent, file size) while the file is sent
         #
         # Return value:
         # > Datatype - boolean
@@ -431,15 +2024,12 @@ class Smartcat:
         ########################################################################
         assert isinstance(file_path, str), "'file_path' should be of type 'str'"
         try:
-            with open(file_path, 'r') as file:
-                pass
+            if not os.path.isfile(file_path):
+                raise FileNotFoundError(f'No such file: {file_path}')
             assert isinstance(project_name, str), "'project_name' should be of type 'str'"
             project_id = self.get_project_id(project_name)
-            url = self._smartcat_url['document_upload']+'?projectId='+project_id
-            if self.debug:
-                print(f'[Smartcat API:upload_document]Project Id: {project_id}')
-                print(f'[Smartcat API:upload_document]Request URL: {url}')
-            resp = self.post_request_smartcat(url, self.authorization_header, upload_file=file_path)
+            resp = self.upload_document_to_project(project_id, file_path, progress)
+            self._add_uploaded_documents(project_name, [resp])
             if (resp.status_code == 200):
                 return True
             else:
@@ -449,6 +2039,137 @@ class Smartcat:
             return False
 
 
+    def upload_document_to_project(self, project_id, file_path, progress=None):
+        ########################################################################
+        # Upload file to a project given by its id
+        #
+        # Args:
+        # project_id:
+        #   > Datatype - string
+        #   > id of the project to which the file is to be uploaded
+        # file_path:
+        #   > Datatype - string
+        #   > path of the file to be uploaded
+        # progress:
+        #   > Datatype - callable
+        #   > called with (file path, bytes sent, file size) while the file is sent
+        #
+        # Return value:
+        # > Datatype - requests.models.Response
+        # > response received
+        ########################################################################
+        assert isinstance(project_id, str), "'project_id' should be of type 'str'"
+        url = _build_url(self._smartcat_url['document_upload'], {'projectId': project_id})
+        if self.debug:
+            print(f'[Smartcat API:upload_document]Project Id: {project_id}')
+            print(f'[Smartcat API:upload_document]Request URL: {url}')
+        return self.post_request_smartcat(url, self.authorization_header, upload_file=file_path, progress=progress)
+
+
+    def upload_documents(self, project_name, paths_or_glob, max_workers=8, progress=None, state_file=None, attempts=1):
+        ########################################################################
+        # Upload many files to a project. Project id is resolved once and files
+        # are uploaded in parallel. With a state file, files uploaded by an
+        # earlier (interrupted or partly failed) run are skipped so only the
+        # missing and failed files are sent again
+        #
+        # Args:
+        # project_name:
+        #   > Datatype - string
+        #   > name of the project to which the files are to be uploaded
+        # paths_or_glob:
+        #   > Datatype - string or list
+        #   > glob pattern, e.g. 'docs/**/*.docx', or list of file paths and glob patterns
+        # max_workers:
+        #   > Datatype - integer
+        #   > number of files uploaded in parallel
+        # progress:
+        #   > Datatype - callable
+        #   > called with (file path, bytes sent, file size) while files are sent
+        # state_file:
+        #   > Datatype - string
+        #   > path of JSON file recording uploaded files, created if missing
+        # attempts:
+        #   > Datatype - integer
+        #   > number of passes made over files whose upload failed
+        #
+        # Return value:
+        # > Datatype - dictionary
+        # > dictionary with file path as key and list of status and response code or error message as value
+        ########################################################################
+        assert isinstance(project_name, str), "'project_name' should be of type 'str'"
+        assert isinstance(paths_or_glob, (str, list)), "'paths_or_glob' should be of type 'str' or 'list'"
+        assert isinstance(max_workers, int) and max_workers > 0, "'max_workers' should be a positive 'int'"
+        assert isinstance(attempts, int) and attempts > 0, "'attempts' should be a positive 'int'"
+        if isinstance(paths_or_glob, str):
+            paths_or_glob = [paths_or_glob]
+        file_paths = []
+        for pattern in paths_or_glob:
+            matches = sorted(glob.glob(pattern, recursive=True)) if any(c in pattern for c in '*?[') else [pattern]
+            for file_path in matches:
+                if file_path not in file_paths:
+                    file_paths.append(file_path)
+        if self.debug:
+            print(f'[Smartcat API:upload_documents]Files: {len(file_paths)}')
+        results = {}
+        upload_state = _UploadState(state_file) if state_file != None else None
+        pending = []
+        for file_path in file_paths:
+            if not os.path.isfile(file_path):
+                results[file_path] = [False, 'File not found']
+            elif upload_state is not None and upload_state.is_uploaded(project_name, file_path):
+                results[file_path] = [True, 'Already uploaded']
+            else:
+                pending.append(file_path)
+        if not pending:
+            return results
+        project_id = self.get_project_id(project_name)
+
+        def upload(file_path):
+            try:
+                resp = self.upload_document_to_project(project_id, file_path, progress)
+                responses.append(resp)
+                result = [resp.status_code == 200, resp.status_code]
+            except Exception as err:
+                print(f'[Smartcat API:upload_documents]Exception: {err}')
+                result = [False, str(err)]
+            if upload_state is not None:
+                upload_state.record(project_name, file_path, result[0], None if result[0] else str(result[1]))
+            return result
+
+        responses = []
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for attempt in range(attempts):
+                    for file_path, result in zip(pending, executor.map(upload, pending)):
+                        results[file_path] = result
+                    pending = [file_path for file_path in pending if not results[file_path][0]]
+                    if not pending:
+                        break
+                    if self.debug:
+                        print(f'[Smartcat API:upload_documents]Failed uploads after attempt {attempt+1}: {len(pending)}')
+        finally:
+            self._add_uploaded_documents(project_name, responses)
+        return results
+
+
+    def _add_uploaded_documents(self, project_name, responses):
+        # upload responses carry the created documents, add them to the cached listing or drop it if they can't be read
+        added = []
+        try:
+            for resp in responses:
+                if resp.status_code == 200:
+                    documents = resp.json()
+                    if not isinstance(documents, list) or not all('id' in doc and 'name' in doc and 'pretranslateCompleted' in doc for doc in documents):
+                        raise ValueError('Unexpected upload response')
+                    added.extend(Document.from_json(doc) for doc in documents)
+        except Exception:
+            self._project_cache.invalidate(project_name)
+            return
+        if not self._project_cache.update_documents(project_name, added=added):
+            self._project_cache.invalidate(project_name)
+
+
     def get_document_id(self, project_name, document_names):
         ########################################################################
         # Get document Id of documents
@@ -469,18 +2190,13 @@ class Smartcat:
         assert isinstance(document_names, list), "'document_name' should be of type 'list'"
         if self.debug:
             print(f'[Smartcat API:get_document_id]Project Name: {project_name}')
-        project_documents = self.get_request_smartcat(self._smartcat_url['project_list'], self.authorization_header, request_query={'projectName':project_name}).json()[0]['documents']
-        # print(f'[Get Document ID]Prjoct Documents: {project_documents}')
+        document_index = self.get_document_index(project_name)
         doc_ids = {}
         for doc_name in document_names:
-            document_name = os.path.splitext(os.path.basename(doc_name))[0]
+            document_name = _document_key(doc_name)
             if self.debug:
                 print(f'[Smartcat API:get_document_id]Document Name: {document_name}')
-            doc_id = []
-            for doc in project_documents:
-                if (doc['name'] == document_name):
-                    doc_id.append(doc['id'])
-            doc_ids[document_name] = doc_id
+            doc_ids[document_name] = document_index.ids(document_name)
         if self.debug:
             print(f'[Smartcat API:get_document_id]Document ID: {doc_ids}')
         return doc_ids
@@ -506,12 +2222,79 @@ class Smartcat:
         for doc in doc_ids.keys():
             received_response = self.make_response(self.get_request_smartcat(self._smartcat_url['document_general']+'/statistics', self.authorization_header, request_query={'documentId': doc_ids[doc]}))
             if received_response['response_code'] == 200:
-                word_count[doc] = [True, received_response['response']['statistics'][0]['words']]
+                word_count[doc] = [True, Statistics.from_json(received_response['response']).words()]
             else:
                 word_count[doc] = [False, 'Build statistics in progress']
         return word_count
 
 
+    def get_documents_statistics(self, project_name, document_names, max_workers=8, retries=5, retry_interval=2, progress=None):
+        ########################################################################
+        # Get statistics of many documents for every target language. Ids of
+        # the documents are resolved with one project listing, statistics of
+        # all language copies of a document are fetched with a single request
+        # and documents are processed in parallel. Requests answered while
+        # statistics are still being built (202 or an empty 200) are repeated,
+        # any other response fails the document
+        #
+        # Args:
+        # project_name:
+        #     > Datatype - string
+        #     > name of the project containing the documents
+        # document_names:
+        #     > Datatype - list
+        #     > list of documents whose statistics are to be fetched
+        # max_workers:
+        #     > Datatype - integer
+        #     > number of statistics requests made in parallel
+        # retries:
+        #     > Datatype - integer
+        #     > number of times a document is retried while its statistics are being built
+        # retry_interval:
+        #     > Datatype - number
+        #     > seconds to wait before retrying a document, doubled on every retry
+        # progress:
+        #     > Datatype - callable
+        #     > called with (document name, documents done, documents total) as documents complete
+        #
+        # Return value:
+        # > Datatype - dictionary
+        # > dictionary with document name as key and list of status and Statistics (entries by target language in 'languages'), or error message
+        ########################################################################
+        assert isinstance(project_name, str), "'project_name' should be of type 'string'"
+        assert isinstance(document_names, list), "'document_names' should be of type 'list'"
+        assert isinstance(max_workers, int) and max_workers > 0, "'max_workers' should be a positive 'int'"
+        doc_ids = self.get_document_id(project_name, document_names)
+
+        def statistics(doc):
+            if not doc_ids[doc]:
+                return [False, 'Document not found']
+            for attempt in range(retries + 1):
+                try:
+                    received_response = self.make_response(self.get_request_smartcat(self._smartcat_url['document_general']+'/statistics', self.authorization_header, request_query={'documentId': doc_ids[doc]}))
+                except Exception as err:
+                    print(f'[Smartcat API:get_documents_statistics]Exception: {err}')
+                    return [False, str(err)]
+                if received_response['response_code'] == 200 and received_response['response']:
+                    return [True, Statistics.from_json(received_response['response'])]
+                # only 202 or an empty 200 mean the statistics are still being built
+                if received_response['response_code'] not in (200, 202):
+                    return [False, f'Statistics request failed with response code {received_response["response_code"]}']
+                if attempt < retries:
+                    if self.debug:
+                        print(f'[Smartcat API:get_documents_statistics]Statistics of {doc} not ready, response code: {received_response["response_code"]}')
+                    time.sleep(retry_interval * (2 ** attempt))
+            return [False, 'Build statistics in progress']
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for doc, result in zip(doc_ids.keys(), executor.map(statistics, doc_ids.keys())):
+                results[doc] = result
+                if progress is not None:
+                    progress(doc, len(results), len(doc_ids))
+        return results
+
+
     def delete_document(self, project_name, document_names):
         ########################################################################
         # Delete document(s)
@@ -536,13 +2319,36 @@ class Smartcat:
         for doc in doc_ids.keys():
             for Id in doc_ids[doc]:
                 delete_doc_ids.append(Id)
-        query = {'documentIds': delete_doc_ids}
+        return self.delete_documents_by_id(project_name, delete_doc_ids)
+
+
+    def delete_documents_by_id(self, project_name, document_ids):
+        ########################################################################
+        # Delete documents given by id, in as many requests as the length of
+        # the id list requires (see batch_request_smartcat)
+        #
+        # Args:
+        # project_name:
+        #     > Datatype - string
+        #     > name of the project containing the documents, its cached listing is updated
+        # document_ids:
+        #     > Datatype - list
+        #     > ids of the documents to be deleted
+        #
+        # Return value:
+        # > Datatype - boolean
+        # > True if all documents deleted else False
+        ########################################################################
+        assert isinstance(document_ids, list), "'document_ids' should be of type 'list'"
+        query = {'documentIds': document_ids}
         if self.debug:
             print(f'[Smartcat API:delete_document]Document Id(s): {query}')
-        resp = self.delete_request_smartcat(self._smartcat_url['document_general'], self.authorization_header, request_query=query)
-        if (resp.status_code == 204):
+        responses = self.batch_request_smartcat('DELETE', self._smartcat_url['document_general'], self.authorization_header, query)
+        if all(resp.status_code == 204 for query, resp in responses):
+            self._project_cache.update_documents(project_name, removed_ids=document_ids)
             return True
         else:
+            self._project_cache.invalidate(project_name)
             return False
 
 
@@ -566,43 +2372,134 @@ class Smartcat:
         assert isinstance(document_names, list), "'document_names' should be of type 'list'"
         if self.debug:
             print(f'[Smartcat API:check_doc_pretranslation_status]Project Name: {project_name}')
-        project_documents = self.get_request_smartcat(self._smartcat_url['project_list'], self.authorization_header, request_query={'projectName':project_name}).json()[0]['documents']
-        doc_status = {}
-        for doc_name in document_names:
-            document_name = os.path.splitext(os.path.basename(doc_name))[0]
-            if self.debug:
-                print(f'[Smartcat API:check_doc_pretranslation_status]Document Name: {document_name}')
-            for doc in project_documents:
-                if (doc['name'] == document_name):
-                    doc_status[document_name] = doc["pretranslateCompleted"]
+        # completed pretranslation never reverts, so a cached listing is only trusted when it reports every document as completed
+        entry = self._project_cache.lookup(project_name)
+        for refresh in (False, True):
+            if refresh:
+                entry = self._get_project_entry(project_name, refresh=True)
+            elif entry is None:
+                continue
+            document_index = entry[1]
+            doc_status = {}
+            for doc_name in document_names:
+                document_name = _document_key(doc_name)
+                if self.debug:
+                    print(f'[Smartcat API:check_doc_pretranslation_status]Document Name: {document_name}')
+                completed = document_index.completed(document_name)
+                if completed is not None:
+                    doc_status[document_name] = completed
+            if len(doc_status) == len(document_names) and all(doc_status.values()):
+                break
         if self.debug:
             print(f'[Smartcat API:check_doc_pretranslation_status]Document Status: {doc_status}')
         return doc_status
 
 
+    def wait_for_pretranslation(self, project_name, document_names, timeout=3600, poll_interval=2, max_poll_interval=60, backoff=1.5):
+        ########################################################################
+        # Wait for pretranslation of document(s) to complete, yielding each
+        # document as soon as it is ready. All pending documents are checked
+        # with a single project listing per poll. The poll interval grows by
+        # 'backoff' while nothing completes and is reset when a document does
+        #
+        # Args:
+        # project_name:
+        #     > Datatype - string
+        #     > name of the project containing the document(s)
+        # document_names:
+        #     > Datatype - list
+        #     > list of documents to wait for
+        # timeout:
+        #     > Datatype - number
+        #     > seconds to wait before giving up on pending documents
+        # poll_interval:
+        #     > Datatype - number
+        #     > initial seconds between polls
+        # max_poll_interval:
+        #     > Datatype - number
+        #     > maximum seconds between polls
+        # backoff:
+        #     > Datatype - number
+        #     > factor the poll interval grows by while nothing completes
+        #
+        # Return value:
+        # > Datatype - generator
+        # > yields tuple(document name, True) as documents complete, then tuple(document name, False) for documents still pending at timeout
+        ########################################################################
+        assert isinstance(project_name, str), "'project_name' should be of type 'string'"
+        assert isinstance(document_names, list), "'document_names' should be of type 'list'"
+        pending = []
+        for doc_name in document_names:
+            document_name = _document_key(doc_name)
+            if document_name not in pending:
+                pending.append(document_name)
+        deadline = time.monotonic() + timeout
+        interval = poll_interval
+        while pending:
+            document_index = self.get_document_index(project_name, refresh=True)
+            completed = [document_name for document_name in pending if document_index.completed(document_name)]
+            for document_name in completed:
+                pending.remove(document_name)
+                if self.debug:
+                    print(f'[Smartcat API:wait_for_pretranslation]Completed: {document_name}')
+                yield document_name, True
+            if not pending:
+                return
+            interval = poll_interval if completed else min(interval * backoff, max_poll_interval)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(interval, remaining))
+        for document_name in pending:
+            if self.debug:
+                print(f'[Smartcat API:wait_for_pretranslation]Timed out: {document_name}')
+            yield document_name, False
+
+
     def get_doc_task_id(self, document_id):
         ########################################################################
         # Get task id for document download. Each task id is for one time use only
         #
         # Args:
         # document_id:
-        #     > Datatype - string
-        #     > id of document to be downloaded
+        #     > Datatype - string or list
+        #     > id of document to be downloaded, or list of ids to export in one task
         #
         # Return value:
         # > Datatype - list(boolean, string)
         # > task id
         ########################################################################
-        assert isinstance(document_id, str), "'document_id' should be of type 'string'"
-        url = self._smartcat_url['document_download']+'?documentIds='+document_id
-        resp = self.make_response(self.post_request_smartcat(url, self.authorization_header))
+        resp = self.create_export_task(document_id)
+        if isinstance(resp, ExportTask):
+            return resp.id
+        else:
+            return resp
+
+
+    def create_export_task(self, document_id):
+        ########################################################################
+        # Create export task for document download
+        #
+        # Args:
+        # document_id:
+        #     > Datatype - string or list
+        #     > id of document to be downloaded, or list of ids to export in one task
+        #
+        # Return value:
+        # > Datatype - ExportTask
+        # > export task, or response content if the task was not created
+        ########################################################################
+        assert isinstance(document_id, (str, list)), "'document_id' should be of type 'string' or 'list'"
+        url = _build_url(self._smartcat_url['document_download'], {'documentIds': document_id})
+        # export only creates a one time download task, so repeating it is harmless
+        resp = self.make_response(self.post_request_smartcat(url, self.authorization_header, idempotent=True))
         if (resp['response_code'] == 200):
-            return resp['response']['id']
+            return ExportTask.from_json(resp['response'])
         else:
             return resp['response']
 
 
-    def download_document(self, project_name, document_name, document_save_as):
+    def download_document(self, project_name, document_name, document_save_as, checksum=None):
         ########################################################################
         # Download translated document
         #
@@ -616,10 +2513,13 @@ class Smartcat:
         # document_save_as:
         #     > Datatype - string
         #     > filename with path to save documnet as
+        # checksum:
+        #     > Datatype - string
+        #     > name of hashlib algorithm to compute over the downloaded file, e.g. 'sha256'
         #
         # Return value:
-        # > Datatype - boolean
-        # > True if document downloaded else False
+        # > Datatype - boolean or string
+        # > True if document downloaded else False. Hex digest of the file instead of True if checksum is given
         ########################################################################
         assert isinstance(project_name, str), "'project_name' should be of type 'string'"
         assert isinstance(document_name, str), "'document_name' should be of type 'string'"
@@ -628,19 +2528,447 @@ class Smartcat:
             print(f'[Smartcat API:download_document]Project Name: {project_name}')
             print(f'[Smartcat API:download_document]Document Name: {document_name}')
             print(f'[Smartcat API:download_document]Save Document: {document_save_as}')
-        doc_name = os.path.splitext(os.path.basename(document_name))[0]
-        doc_id = self.get_document_id(project_name, [document_name])[doc_name][0]
+        # the translation cache compares revisions, which a cached listing may not show yet
+        doc = self.get_document_index(project_name, refresh=self._translation_cache is not None).documents(_document_key(document_name))[0]
+        doc_id = doc.id
+        if self._translation_cache is not None and self._translation_cache.get(doc_id, _TranslationCache.revision(doc), document_save_as):
+            if self.debug:
+                print(f'[Smartcat API:download_document]Served from translation cache: {doc_id}')
+            return self._file_digest(document_save_as, checksum) if checksum != None else True
         task_id = self.get_doc_task_id(doc_id)
         if task_id != '':
-            url = self._smartcat_url['document_download']+'/'+task_id
-            file_content = self.get_request_smartcat(url, self.authorization_header)._content
+            resp = self.get_export_result(task_id)
             if self.debug:
-                print(f'[Smartcat API:download_document]Response: {file_content}')
-            with open(document_save_as, 'wb+') as f:
-                f.write(file_content)
-            return True
+                print(f'[Smartcat API:download_document]Response: {resp.status_code}, {resp.headers.get("Content-Length")} bytes')
+            if resp.status_code != 200:
+                resp.close()
+                return False
+            digest = self.save_response(resp, document_save_as, checksum)
+            if self._translation_cache is not None:
+                self._translation_cache.put(doc_id, _TranslationCache.revision(doc), document_save_as)
+            return digest if checksum != None else True
         else:
             return False
 
 
+    def get_export_result(self, task_id, poll_interval=1, poll_timeout=300):
+        ########################################################################
+        # Fetch result of an export task, polling while the export is being prepared
+        #
+        # Args:
+        # task_id:
+        #     > Datatype - string
+        #     > export task id returned by get_doc_task_id
+        # poll_interval:
+        #     > Datatype - number
+        #     > seconds to wait between polls
+        # poll_timeout:
+        #     > Datatype - number
+        #     > seconds to wait for the export before giving up
+        #
+        # Return value:
+        # > Datatype - requests.models.Response
+        # > streamed response received, status code 204 if export is still not ready
+        ########################################################################
+        assert isinstance(task_id, str), "'task_id' should be of type 'string'"
+        url = self._smartcat_url['document_download']+'/'+task_id
+        deadline = time.monotonic() + poll_timeout
+        while True:
+            resp = self.get_request_smartcat(url, self.authorization_header, stream=True)
+            if resp.status_code != 204 or time.monotonic() + poll_interval > deadline:
+                return resp
+            resp.close()
+            time.sleep(poll_interval)
+
+
+    def _save_export_result(self, resp, batch, languages=None, add_extension=False):
+        ########################################################################
+        # Save export result to the paths of the exported documents. batch is
+        # a list of tuple(document name, Smartcat document name, document id,
+        # path to save as) in the order the ids were given to the export task.
+        # Archives of several documents are extracted while they are received
+        #
+        # Args:
+        # languages:
+        #     > Datatype - dictionary
+        #     > target language by document id, tells apart archive entries of
+        #       copies of one document in different languages
+        # add_extension:
+        #     > Datatype - boolean
+        #     > append the extension of the exported file (archive entry or
+        #       Content-Disposition file name) to the paths to save as
+        #
+        # Return value:
+        # > Datatype - dictionary
+        # > dictionary with document name as key and list of status and saved path or error message as value
+        ########################################################################
+        if resp.status_code != 200:
+            resp.close()
+            return {doc[0]: [False, f'Export failed with response code {resp.status_code}'] for doc in batch}
+        if len(batch) == 1:
+            save_as = batch[0][3]
+            if add_extension:
+                # a single document is returned as is, name it after the file given by the server
+                match = re.search(r'filename\*?=(?:UTF-8\'\')?"?([^";]+)"?', resp.headers.get('Content-Disposition', ''))
+                if match:
+                    save_as += os.path.splitext(match.group(1))[1]
+            self.save_response(resp, save_as)
+            return {batch[0][0]: [True, save_as]}
+        # multi-document exports are returned as a zip archive of the translated files
+        languages = languages or {}
+        batch_results = {doc[0]: [False, 'Document missing from export archive'] for doc in batch}
+        batch_by_name = {}
+        for doc in batch:
+            batch_by_name.setdefault(doc[1], []).append(doc)
+        copies = {name: len(docs) for name, docs in batch_by_name.items()}
+        try:
+            for entry_name, content in _ZipStream(resp.iter_content(chunk_size=1024*1024)).entries():
+                name = _document_key(entry_name)
+                waiting = batch_by_name.get(name)
+                if not waiting:
+                    continue
+                # copies of a document in several languages are told apart by the language folder of the entry path
+                folders = entry_name.split('/')[:-1]
+                doc = next((doc for doc in waiting if languages.get(doc[2]) in folders), None)
+                if doc is None and copies[name] == 1:
+                    doc = waiting[0]
+                if doc is None:
+                    for other in waiting:
+                        batch_results[other[0]] = [False, f'Ambiguous export archive entry {entry_name}']
+                    continue
+                waiting.remove(doc)
+                save_as = doc[3]+os.path.splitext(entry_name)[1] if add_extension else doc[3]
+                _write_file(content, save_as)
+                batch_results[doc[0]] = [True, save_as]
+        except zipfile.BadZipFile as err:
+            for doc in batch:
+                if not batch_results[doc[0]][0]:
+                    batch_results[doc[0]] = [False, f'Bad export archive: {err}']
+        finally:
+            resp.close()
+        return batch_results
+
+
+    def download_documents(self, project_name, documents, batch_size=10, max_workers=8, poll_interval=1, poll_timeout=300, progress=None):
+        ########################################################################
+        # Download many translated documents. Document ids are resolved with a
+        # single project listing, export tasks are requested for batches of
+        # documents and batches are exported and fetched concurrently
+        #
+        # Args:
+        # project_name:
+        #     > Datatype - string
+        #     > name of the project from which documents are to be downloaded
+        # documents:
+        #     > Datatype - dictionary
+        #     > filename with path to save document as, with document name as key
+        # batch_size:
+        #     > Datatype - integer
+        #     > number of documents exported by one export task
+        # max_workers:
+        #     > Datatype - integer
+        #     > number of export tasks processed in parallel
+        # poll_interval:
+        #     > Datatype - number
+        #     > seconds to wait between polls of an export task
+        # poll_timeout:
+        #     > Datatype - number
+        #     > seconds to wait for an export task before giving up
+        # progress:
+        #     > Datatype - callable
+        #     > called with (document name, documents done, documents total) as documents complete
+        #
+        # Return value:
+        # > Datatype - dictionary
+        # > dictionary with document name as key and list of status and saved path or error message as value
+        ########################################################################
+        assert isinstance(project_name, str), "'project_name' should be of type 'string'"
+        assert isinstance(documents, dict), "'documents' should be of type 'dict'"
+        assert isinstance(batch_size, int) and batch_size > 0, "'batch_size' should be a positive 'int'"
+        assert isinstance(max_workers, int) and max_workers > 0, "'max_workers' should be a positive 'int'"
+        # the translation cache compares revisions, which a cached listing may not show yet
+        document_index = self.get_document_index(project_name, refresh=self._translation_cache is not None)
+        results = {}
+        pending = []
+        revisions = {}
+        for document_name, save_as in documents.items():
+            doc_name = _document_key(document_name)
+            docs = document_index.documents(doc_name)
+            if not docs:
+                results[document_name] = [False, 'Document not found']
+                continue
+            if self._translation_cache is not None:
+                revisions[document_name] = _TranslationCache.revision(docs[0])
+                if self._translation_cache.get(docs[0].id, revisions[document_name], save_as):
+                    results[document_name] = [True, save_as]
+                    continue
+            pending.append((document_name, doc_name, docs[0].id, save_as))
+        batches = [pending[i:i+batch_size] for i in range(0, len(pending), batch_size)]
+        if self.debug:
+            print(f'[Smartcat API:download_documents]Documents: {len(pending)}, Export tasks: {len(batches)}')
+
+        def download_batch(batch):
+            task = self.create_export_task([doc[2] for doc in batch])
+            if not isinstance(task, ExportTask):
+                return {doc[0]: [False, f'Export task not created: {task}'] for doc in batch}
+            return self._save_export_result(self.get_export_result(task.id, poll_interval, poll_timeout), batch)
+
+        def safe_download_batch(batch):
+            try:
+                return download_batch(batch)
+            except Exception as err:
+                print(f'[Smartcat API:download_documents]Exception: {err}')
+                return {doc[0]: [False, str(err)] for doc in batch}
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for batch_results in executor.map(safe_download_batch, batches):
+                results.update(batch_results)
+                if progress is not None:
+                    for document_name in batch_results:
+                        progress(document_name, len(results), len(documents))
+        if self._translation_cache is not None:
+            for document_name, doc_name, doc_id, save_as in pending:
+                if results[document_name][0]:
+                    self._translation_cache.put(doc_id, revisions[document_name], save_as)
+        return results
+
+    def download_document_languages(self, project_name, document_names, output_dir, languages=None, batch_size=10, max_workers=8, poll_interval=1, poll_timeout=300):
+        ########################################################################
+        # Download translations of documents into every target language (or
+        # the given ones). All language copies of up to batch_size documents
+        # are exported by a single export task, and the archive returned is
+        # extracted while it is received into <output_dir>/<language>/
+        #
+        # Args:
+        # project_name:
+        #     > Datatype - string
+        #     > name of the project containing the documents
+        # document_names:
+        #     > Datatype - list
+        #     > list of documents to download
+        # output_dir:
+        #     > Datatype - string
+        #     > directory to save translations to, one folder per target language
+        # languages:
+        #     > Datatype - list
+        #     > target languages to download, all target languages of the documents if None
+        # batch_size:
+        #     > Datatype - integer
+        #     > number of documents (with all their languages) exported by one export task
+        # max_workers:
+        #     > Datatype - integer
+        #     > number of export tasks processed in parallel
+        # poll_interval, poll_timeout:
+        #     > Datatype - number
+        #     > seconds between polls of an export task and to wait for it
+        #
+        # Return value:
+        # > Datatype - dictionary
+        # > dictionary with document name as key and dictionary of list of status and saved path or error message by language as value. A document not found fails in every language requested, or every target language of the project
+        ########################################################################
+        assert isinstance(project_name, str), "'project_name' should be of type 'string'"
+        assert isinstance(document_names, list), "'document_names' should be of type 'list'"
+        assert isinstance(output_dir, str), "'output_dir' should be of type 'string'"
+        assert isinstance(batch_size, int) and batch_size > 0, "'batch_size' should be a positive 'int'"
+        assert isinstance(max_workers, int) and max_workers > 0, "'max_workers' should be a positive 'int'"
+        project, document_index = self._get_project_entry(project_name)
+        results = {}
+        exports = []
+        target_languages = {}
+        for document_name in document_names:
+            docs = [doc for doc in document_index.documents(_document_key(document_name)) if languages == None or doc.target_language in languages]
+            if not docs:
+                results[document_name] = {language: [False, 'Document not found'] for language in (languages if languages != None else project.target_languages or [])}
+                continue
+            results[document_name] = {doc.target_language: [False, 'Not exported'] for doc in docs}
+            items = []
+            for doc in docs:
+                os.makedirs(os.path.join(output_dir, doc.target_language), exist_ok=True)
+                target_languages[doc.id] = doc.target_language
+                items.append(((document_name, doc.target_language), doc.name, doc.id, os.path.join(output_dir, doc.target_language, doc.name)))
+            exports.append(items)
+        batches = [[item for items in exports[i:i+batch_size] for item in items] for i in range(0, len(exports), batch_size)]
+        if self.debug:
+            print(f'[Smartcat API:download_document_languages]Documents: {len(exports)}, Export tasks: {len(batches)}')
+
+        def download_batch(batch):
+            try:
+                task = self.create_export_task([item[2] for item in batch])
+                if not isinstance(task, ExportTask):
+                    return {item[0]: [False, f'Export task not created: {task}'] for item in batch}
+                resp = self.get_export_result(task.id, poll_interval, poll_timeout)
+                # files are named after the exported files, whose extension the project listing does not give
+                return self._save_export_result(resp, batch, target_languages, add_extension=True)
+            except Exception as err:
+                print(f'[Smartcat API:download_document_languages]Exception: {err}')
+                return {item[0]: [False, str(err)] for item in batch}
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for batch_results in executor.map(download_batch, batches):
+                for (document_name, language), result in batch_results.items():
+                    results[document_name][language] = result
+        return results
+
+
+    def sync_directory(self, project_name, directory, pattern='**/*', manifest_file=None, delete_removed=False, download_dir=None, batch_size=10, max_workers=8):
+        ########################################################################
+        # Bring a project up to date with a local directory. Files are compared
+        # with the content hashes recorded in a manifest by the previous sync:
+        # new and changed files are uploaded (the old documents of a changed
+        # file are deleted first), unchanged files are skipped. Translations
+        # are downloaded only when their state in the project listing changed
+        # since they were last downloaded
+        #
+        # Args:
+        # project_name:
+        #     > Datatype - string
+        #     > name of the project to sync
+        # directory:
+        #     > Datatype - string
+        #     > local directory with the source files
+        # pattern:
+        #     > Datatype - string
+        #     > glob pattern of the files to sync, relative to directory
+        # manifest_file:
+        #     > Datatype - string
+        #     > path of the JSON manifest, '.smartcat_sync.json' in directory by default
+        # delete_removed:
+        #     > Datatype - boolean
+        #     > delete documents of files removed from the directory
+        # download_dir:
+        #     > Datatype - string
+        #     > directory to download pretranslated documents to as <target language>/<relative path>, None to not download
+        # batch_size:
+        #     > Datatype - integer
+        #     > number of documents exported by one export task
+        # max_workers:
+        #     > Datatype - integer
+        #     > number of files hashed, uploaded or downloaded in parallel
+        #
+        # Return value:
+        # > Datatype - dictionary
+        # > 'uploaded', 'updated', 'unchanged', 'deleted' lists of relative paths, 'downloaded' list of saved paths
+        #   and 'failed' dictionary with relative path as key and error message as value
+        ########################################################################
+        assert isinstance(project_name, str), "'project_name' should be of type 'str'"
+        assert os.path.isdir(directory), "'directory' should be an existing directory"
+        assert isinstance(max_workers, int) and max_workers > 0, "'max_workers' should be a positive 'int'"
+        if manifest_file == None:
+            manifest_file = os.path.join(directory, '.smartcat_sync.json')
+        manifest = _SyncManifest(manifest_file)
+        synced = manifest.files(project_name)
+        file_paths = {}
+        for file_path in sorted(glob.glob(os.path.join(directory, pattern), recursive=True)):
+            if os.path.isfile(file_path) and os.path.abspath(file_path) != os.path.abspath(manifest_file) and not file_path.endswith('.part'):
+                file_paths[os.path.relpath(file_path, directory).replace(os.sep, '/')] = file_path
+        report = {'uploaded': [], 'updated': [], 'unchanged': [], 'deleted': [], 'downloaded': [], 'failed': {}}
+
+        def content_hash(relative_path):
+            # files whose size and modification time match the manifest are not read again
+            stat = os.stat(file_paths[relative_path])
+            entry = synced.get(relative_path)
+            if entry is not None and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+                return entry['sha256'], stat
+            return self._file_digest(file_paths[relative_path], 'sha256'), stat
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            hashes = dict(zip(file_paths, executor.map(content_hash, file_paths)))
+        document_index = self.get_document_index(project_name, refresh=True)
+        changed = []
+        for relative_path, (sha256, stat) in hashes.items():
+            entry = synced.get(relative_path)
+            if entry is not None and entry['sha256'] == sha256 and entry['document_ids'] and all(document_id in document_index.by_id for document_id in entry['document_ids']):
+                entry['size'], entry['mtime'] = stat.st_size, stat.st_mtime
+                report['unchanged'].append(relative_path)
+            else:
+                changed.append(relative_path)
+        removed = [relative_path for relative_path in synced if relative_path not in file_paths] if delete_removed else []
+        if self.debug:
+            print(f'[Smartcat API:sync_directory]Files: {len(file_paths)}, changed: {len(changed)}, removed: {len(removed)}')
+
+        # documents of changed and removed files are deleted in one go, a changed file is only uploaded once its old documents are gone
+        stale = {relative_path: [document_id for document_id in synced[relative_path]['document_ids'] if document_id in document_index.by_id] for relative_path in changed + removed if relative_path in synced}
+        stale_ids = [document_id for document_ids in stale.values() for document_id in document_ids]
+        if stale_ids and not self.delete_documents_by_id(project_name, stale_ids):
+            for relative_path in stale:
+                report['failed'][relative_path] = 'Delete of previous documents failed'
+            changed = [relative_path for relative_path in changed if relative_path not in stale]
+            removed = []
+        for relative_path in removed:
+            del synced[relative_path]
+            report['deleted'].append(relative_path)
+
+        if changed:
+            project_id = self.get_project_id(project_name)
+
+            def upload(relative_path):
+                try:
+                    resp = self.upload_document_to_project(project_id, file_paths[relative_path])
+                    return resp, resp.json() if resp.status_code == 200 else None
+                except Exception as err:
+                    return err, None
+
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                uploads = list(executor.map(upload, changed))
+            for relative_path, (resp, documents) in zip(changed, uploads):
+                if not isinstance(documents, list):
+                    report['failed'][relative_path] = f'Upload failed: {resp.status_code if hasattr(resp, "status_code") else resp}'
+                    synced.pop(relative_path, None)
+                    continue
+                sha256, stat = hashes[relative_path]
+                report['updated' if relative_path in synced else 'uploaded'].append(relative_path)
+                synced[relative_path] = {'sha256': sha256, 'size': stat.st_size, 'mtime': stat.st_mtime, 'document_ids': [doc['id'] for doc in documents], 'translations': {}}
+            self._add_uploaded_documents(project_name, [resp for resp, documents in uploads if isinstance(documents, list)])
+        manifest.save()
+
+        if download_dir != None:
+            document_index = self.get_document_index(project_name)
+            pending = []
+            for relative_path in file_paths:
+                entry = synced.get(relative_path)
+                if entry is None:
+                    continue
+                for document_id in entry['document_ids']:
+                    doc = document_index.by_id.get(document_id)
+                    if doc is None or not doc.pretranslate_completed:
+                        continue
+                    save_as = os.path.join(download_dir, doc.target_language or '', relative_path)
+                    revision = _TranslationCache.revision(doc)
+                    if entry['translations'].get(document_id) != revision or not os.path.isfile(save_as):
+                        pending.append(((relative_path, document_id, revision), doc.name, document_id, save_as))
+            # archive entries are matched by document name and language, so one export task never holds two documents of the same name and language
+            languages = {item[2]: document_index.by_id[item[2]].target_language for item in pending}
+            batches = []
+            for item in pending:
+                for batch in batches:
+                    if len(batch) < batch_size and all(other[1] != item[1] or languages[other[2]] != languages[item[2]] for other in batch):
+                        batch.append(item)
+                        break
+                else:
+                    batches.append([item])
+
+            def download_batch(batch):
+                try:
+                    for item in batch:
+                        os.makedirs(os.path.dirname(os.path.abspath(item[3])), exist_ok=True)
+                    task = self.create_export_task([item[2] for item in batch])
+                    if not isinstance(task, ExportTask):
+                        return {item[0]: [False, f'Export task not created: {task}'] for item in batch}
+                    return self._save_export_result(self.get_export_result(task.id), batch, languages)
+                except Exception as err:
+                    return {item[0]: [False, str(err)] for item in batch}
+
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for batch, results in zip(batches, executor.map(download_batch, batches)):
+                    for item in batch:
+                        relative_path, document_id, revision = item[0]
+                        if results[item[0]][0]:
+                            synced[relative_path]['translations'][document_id] = revision
+                            report['downloaded'].append(item[3])
+                        else:
+                            report['failed'][relative_path] = f'Download failed: {results[item[0]][1]}'
+            manifest.save()
+        return report
+
+
 ################################################################################
\ No newline at end of file
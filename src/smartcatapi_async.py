@@ -0,0 +1,554 @@
+################################################################################
+# Smartcat API asyncio helper module
+#
+# Description:
+# Asynchronous counterpart of the Smartcat class in smartcatapi. Implements
+# the same operation methods on top of aiohttp, with a semaphore bounding the
+# number of requests in flight so a single event loop can drive many
+# concurrent Smartcat operations
+#
+# Notes:
+# > Requires aiohttp
+# > The object must be closed (or used as 'async with') to release connections
+################################################################################
+import os
+import json
+import asyncio
+import uuid
+import aiohttp
+from smartcatapi import Smartcat, Project, Statistics, ExportTask, _ProjectCache, _document_key, _query_pairs, _split_query, _load_api_credentials, _SingleFlight, _RetryPolicy, _TokenBucket
+
+class _AsyncSingleFlight(_SingleFlight):
+    ############################################################################
+    # _SingleFlight for coroutines of one event loop: callers of a key in
+    # flight await the task of the first caller. The task is shielded so a
+    # cancelled caller does not cancel it for the others
+    ############################################################################
+    async def do(self, key, endpoint, function):
+        with self._lock:
+            task = self._in_flight.get(key)
+            leader = task is None
+            if leader:
+                task = self._in_flight[key] = asyncio.ensure_future(function())
+                task.add_done_callback(lambda done: self._in_flight.pop(key, None))
+            self._count(endpoint, 'executed' if leader else 'coalesced')
+        return await asyncio.shield(task)
+
+
+class AsyncSmartcat:
+    def __init__(self, max_concurrency=20, pool_maxsize=100, timeout=300, cache_ttl=60, cache_size=128, max_retries=3, backoff_factor=0.5, backoff_max=60, rate_limit=None, rate_burst=None, server_url=None, max_url_length=2048, api_login_id=None, api_key=None, config_file_path=None, coalesce_requests=True):
+        ########################################################################
+        # Args:
+        # max_concurrency:
+        #     > Datatype - integer
+        #     > maximum number of requests in flight at once
+        # pool_maxsize:
+        #     > Datatype - integer
+        #     > maximum number of connections kept per host
+        # timeout:
+        #     > Datatype - number
+        #     > total timeout in seconds applied to every request
+        # cache_ttl:
+        #     > Datatype - number
+        #     > seconds a cached project listing stays valid, 0 disables the cache
+        # cache_size:
+        #     > Datatype - integer
+        #     > maximum number of project listings kept in the cache
+        # max_retries, backoff_factor, backoff_max, rate_limit, rate_burst:
+        #     > retry policy and rate limiter settings, see Smartcat
+        # server_url:
+        #     > Datatype - string
+        #     > Smartcat server to use instead of https://smartcat.ai
+        # max_url_length:
+        #     > Datatype - integer
+        #     > maximum length of a request url, longer id lists are split into several requests
+        # api_login_id, api_key, config_file_path:
+        #     > API credentials or config file to load them from, see Smartcat
+        # coalesce_requests:
+        #     > Datatype - boolean
+        #     > concurrent identical GET requests share one request and its response
+        ########################################################################
+        assert isinstance(max_concurrency, int), "'max_concurrency' should be of type 'int'"
+        assert isinstance(pool_maxsize, int), "'pool_maxsize' should be of type 'int'"
+        self.authorization_header = None
+        self.debug = False
+        self.timeout = timeout
+        self.pool_maxsize = pool_maxsize
+        self.max_url_length = max_url_length
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._session = None
+        self._project_cache = _ProjectCache(cache_ttl, cache_size)
+        self._retry_policy = _RetryPolicy(max_retries, backoff_factor, backoff_max, connect_errors=(aiohttp.ClientConnectorError,))
+        self._rate_limiter = _TokenBucket(rate_limit, rate_burst) if rate_limit else None
+        self._single_flight = _AsyncSingleFlight() if coalesce_requests else None
+        if server_url != None:
+            assert isinstance(server_url, str), "'server_url' should be of type 'str'"
+            self._smartcat_url = {key: server_url.rstrip('/')+url[len(Smartcat._smartcat_server):] for key, url in self._smartcat_url.items()}
+        if config_file_path != None:
+            assert isinstance(config_file_path, str), "'config_file_path' should be of type 'str'"
+            self._config_file_path = config_file_path
+        if api_login_id != None or api_key != None:
+            self.authorization_header = {'Authorization': self.encode_authorization_data(api_login_id, api_key)}
+        elif config_file_path != None:
+            self.load_api_credentails()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+        return False
+
+    async def close(self):
+        ########################################################################
+        # Close pooled connections held by the client
+        #
+        # Return value:
+        # > None
+        ########################################################################
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    _smartcat_url = Smartcat._smartcat_url
+    _config_file_path = Smartcat._config_file_path
+    encode_authorization_data = Smartcat.encode_authorization_data
+    endpoint_key = Smartcat.endpoint_key
+
+    def set_debug(self, flag):
+        ########################################################################
+        # Enable or Disable debug
+        #
+        # Args:
+        # flag:
+        #     > Datatype - boolean
+        #     > set debug flag
+        #
+        # Return value:
+        # > None
+        ########################################################################
+        self.debug = flag
+
+    def get_cache_stats(self):
+        ########################################################################
+        # Get project metadata cache statistics
+        #
+        # Return value:
+        # > Datatype - dictionary
+        # > number of cache hits, misses and cached projects
+        ########################################################################
+        return self._project_cache.stats()
+
+    def get_coalescing_stats(self):
+        ########################################################################
+        # Get number of GET requests sent and of identical concurrent calls
+        # that shared them, per endpoint
+        #
+        # Return value:
+        # > Datatype - dictionary
+        # > 'executed' and 'coalesced' totals and per endpoint counts in 'endpoints'
+        ########################################################################
+        if self._single_flight is None:
+            return {'executed': 0, 'coalesced': 0, 'endpoints': {}}
+        return self._single_flight.stats()
+
+    def invalidate_project_cache(self, project_name=None):
+        ########################################################################
+        # Drop cached metadata of a project, or of all projects if no name given
+        #
+        # Return value:
+        # > None
+        ########################################################################
+        self._project_cache.invalidate(project_name)
+
+
+###############################################################################
+# API Configuration
+
+    def load_api_credentails(self):
+        ########################################################################
+        # Load saved API credentials from the config file used by Smartcat
+        #
+        # Return value:
+        # > Datatype - boolean
+        # > True if loaded successfully else False
+        ########################################################################
+        try:
+            api_login_id, api_key = _load_api_credentials(self._config_file_path or Smartcat._config_file_path)
+            self.authorization_header = {'Authorization': self.encode_authorization_data(api_login_id, api_key)}
+            return True
+        except Exception as err:
+            print(f'[Smartcat API:load_api_credentails]Exception: {err}')
+            return False
+
+
+################################################################################
+
+
+################################################################################
+# API Requests
+
+    def _get_session(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.pool_maxsize, limit_per_host=self.pool_maxsize)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
+
+    async def request_smartcat(self, method, url, request_query=None, request_data=None, upload_file=None, save_as=None, idempotent=False):
+        ########################################################################
+        # Make request to smartcat API, waiting for the rate limiter and retrying
+        # throttled or failed requests with the same policy as Smartcat
+        #
+        # Args:
+        # method:
+        #     > Datatype - string
+        #     > 'GET', 'POST' or 'DELETE'
+        # url:
+        #     > Datatype - string
+        #     > url to make request to
+        # request_query:
+        #     > Datatype - dictionary
+        #     > query data to encode in url
+        # request_data:
+        #     > Datatype - string
+        #     > request payload in JSON format
+        # upload_file:
+        #     > Datatype - string
+        #     > path of file to send as multipart body
+        # save_as:
+        #     > Datatype - string
+        #     > stream response body to this file (via a temporary file renamed once complete) instead of returning it
+        # idempotent:
+        #     > Datatype - boolean
+        #     > request may be retried even after it reached the server
+        #
+        # Return value:
+        # > Datatype - tuple(integer, bytes)
+        # > response status code and content
+        ########################################################################
+        assert isinstance(url, str), "'url' should be of type 'string'"
+        assert isinstance(self.authorization_header, dict), "credentials should be loaded before making requests"
+        params = None
+        if request_query != None:
+            assert isinstance(request_query, dict), "'request_query' should be of type 'dict'"
+            params = _query_pairs(request_query)
+        if request_data != None:
+            assert isinstance(request_data, str), "'request_data' should be of type 'string'"
+        if self.debug:
+            print(f'[Smartcat API:{method}]Request URL: {url}')
+            print(f'[Smartcat API:{method}]Request Query: {request_query}')
+        if method == 'GET' and save_as == None and self._single_flight is not None:
+            key = (url, tuple(params or ()), request_data, tuple(sorted(self.authorization_header.items())))
+            return await self._single_flight.do(key, self.endpoint_key(url), lambda: self._send(method, url, params, request_data, upload_file, save_as, idempotent))
+        return await self._send(method, url, params, request_data, upload_file, save_as, idempotent)
+
+    async def _send(self, method, url, params, request_data, upload_file, save_as, idempotent):
+        attempt = 0
+        while True:
+            if self._rate_limiter is not None:
+                wait = self._rate_limiter.reserve()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            try:
+                status, content, headers = await self._request_once(method, url, params, request_data, upload_file, save_as)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                if not self._retry_policy.should_retry(method, attempt, error=err, idempotent=idempotent):
+                    raise
+                delay = self._retry_policy.delay(attempt)
+                if self.debug:
+                    print(f'[Smartcat API:{method}]Retry {attempt+1} in {delay:.2f}s after exception: {err}')
+            else:
+                if not self._retry_policy.should_retry(method, attempt, status_code=status, idempotent=idempotent):
+                    return status, content
+                delay = self._retry_policy.delay(attempt, headers)
+                if self.debug:
+                    print(f'[Smartcat API:{method}]Retry {attempt+1} in {delay:.2f}s after response code: {status}')
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _request_once(self, method, url, params, request_data, upload_file, save_as):
+        async with self._semaphore:
+            file = None
+            try:
+                form_data = None
+                if upload_file != None:
+                    file = open(upload_file, 'rb')
+                    form_data = aiohttp.FormData()
+                    form_data.add_field('', file, filename=os.path.basename(upload_file), content_type='application/octet-stream')
+                elif request_data != None:
+                    form_data = aiohttp.FormData()
+                    form_data.add_field('', request_data, content_type='application/json')
+                async with self._get_session().request(method, url, params=params, data=form_data, headers=self.authorization_header) as resp:
+                    if save_as != None and resp.status == 200:
+                        temp_path = os.path.join(os.path.dirname(os.path.abspath(save_as)), '.'+os.path.basename(save_as)+'.'+uuid.uuid4().hex+'.part')
+                        # file operations run in the default executor so they do not block the event loop
+                        loop = asyncio.get_running_loop()
+                        try:
+                            f = await loop.run_in_executor(None, open, temp_path, 'xb')
+                            try:
+                                async for chunk in resp.content.iter_chunked(1024*1024):
+                                    await loop.run_in_executor(None, f.write, chunk)
+                            finally:
+                                await loop.run_in_executor(None, f.close)
+                            await loop.run_in_executor(None, os.replace, temp_path, save_as)
+                        except BaseException:
+                            # the temporary file is missing if it could not be created, report the original error
+                            try:
+                                os.unlink(temp_path)
+                            except FileNotFoundError:
+                                pass
+                            raise
+                        return resp.status, b'', resp.headers
+                    return resp.status, await resp.read(), resp.headers
+            finally:
+                if file is not None:
+                    file.close()
+
+    def make_response(self, status, content):
+        ########################################################################
+        # Reformat received reponse into dictionary
+        #
+        # Return value:
+        # > Datatype - dictionary
+        # > dictionary of response code and content
+        ########################################################################
+        try:
+            return {'response_code':status, 'response':json.loads(content)}
+        except Exception as err:
+            print(f'[Smartcat API:make_response]Exception: {err}')
+            return {'response_code':status, 'response':''}
+
+
+################################################################################
+
+
+################################################################################
+# API Operation Methods
+
+    async def create_project(self, project_name, source_language, target_languages, pretranslate=True):
+        ########################################################################
+        # Create project in Smartcat workspace
+        #
+        # Return value:
+        # > Datatype - dictionary
+        # > dictionary of reponse code and response content, a Project if the project was created
+        ########################################################################
+        assert isinstance(project_name, str), "'project_name' should be of type 'string'"
+        assert isinstance(source_language, str), "'source_language' should be of type 'string'"
+        assert isinstance(target_languages, list), "'target_languages' should be of type 'list'"
+        assert isinstance(pretranslate, bool), "'pretranslate' should be of type 'boolean'"
+        payload = json.dumps({'name': project_name, 'sourceLanguage': source_language, 'targetLanguages': target_languages, 'assignToVendor': False, 'useMT': pretranslate, 'pretranslate': pretranslate, 'autoPropagateRepetitions': True})
+        if self.debug:
+            print(f'[Smartcat API:create_project]Request payload: {payload}')
+        resp = self.make_response(*await self.request_smartcat('POST', self._smartcat_url['project_create'], request_data=payload))
+        if resp['response_code'] == 200 and isinstance(resp['response'], dict):
+            resp['response'] = Project.from_json(resp['response'])
+        self._project_cache.invalidate(project_name)
+        return resp
+
+    async def get_project(self, project_name, refresh=False):
+        ########################################################################
+        # Get project listing (id, documents and their status) of the project
+        #
+        # Return value:
+        # > Datatype - Project
+        # > project as returned by Smartcat project list, its documents as Document models
+        ########################################################################
+        return (await self._get_project_entry(project_name, refresh))[0]
+
+    async def get_document_index(self, project_name, refresh=False):
+        ########################################################################
+        # Get index of project documents, built once per project listing
+        #
+        # Return value:
+        # > Datatype - _DocumentIndex
+        # > 'by_name' maps document name to its documents, 'by_id' maps id to document
+        ########################################################################
+        return (await self._get_project_entry(project_name, refresh))[1]
+
+    async def _get_project_entry(self, project_name, refresh=False):
+        assert isinstance(project_name, str), "'project_name' should be of type 'string'"
+        assert isinstance(self.authorization_header, dict), "credentials should be loaded before making requests"
+        entry = None if refresh else self._project_cache.lookup(project_name)
+        if entry is None:
+            # a listing requested before the project changed is neither cached nor shared with callers that came after the change
+            generation = self._project_cache.generation(project_name)
+            url = self._smartcat_url['project_list']
+            params = _query_pairs({'projectName': project_name})
+            headers = self.authorization_header
+            fetch = lambda: self._send('GET', url, params, None, None, None, False)
+            if self._single_flight is None:
+                status, content = await fetch()
+            else:
+                status, content = await self._single_flight.do((url, tuple(params), generation, tuple(sorted(headers.items()))), self.endpoint_key(url), fetch)
+            if status != 200:
+                raise aiohttp.ClientError(f'Project list failed with response code {status}')
+            projects = json.loads(content)
+            if not isinstance(projects, list) or not projects:
+                raise IndexError(f'Project not found: {project_name}')
+            # the listing matches names containing project_name, prefer the project named exactly so
+            entry = self._project_cache.put(project_name, Project.from_json(next((project for project in projects if project.get('name') == project_name), projects[0])), generation)
+        return entry
+
+    async def get_project_id(self, project_name):
+        ########################################################################
+        # Get project Id of the project
+        #
+        # Return value:
+        # > Datatype - string
+        # > project id of the given project name
+        ########################################################################
+        return (await self.get_project(project_name))['id']
+
+    async def delete_project(self, project_name):
+        ########################################################################
+        # Delete project
+        #
+        # Return value:
+        # > Datatype - boolean
+        # > True if project deleted else False
+        ########################################################################
+        assert isinstance(project_name, str),"'project_id' should be of type 'string'"
+        project_id = await self.get_project_id(project_name)
+        if self.debug:
+            print(f'[Smartcat API:delete_project]Project Id: {project_id}')
+        status, content = await self.request_smartcat('DELETE', self._smartcat_url['project_general']+'/'+project_id)
+        self._project_cache.invalidate(project_name)
+        return status == 204
+
+    async def upload_document(self, project_name, file_path):
+        ########################################################################
+        # Upload file to a project
+        #
+        # Return value:
+        # > Datatype - boolean
+        # > True if file uploaded else False
+        ########################################################################
+        assert isinstance(file_path, str), "'file_path' should be of type 'str'"
+        assert isinstance(project_name, str), "'project_name' should be of type 'str'"
+        try:
+            project_id = await self.get_project_id(project_name)
+            status, content = await self.request_smartcat('POST', self._smartcat_url['document_upload'], request_query={'projectId': project_id}, upload_file=file_path)
+            self._project_cache.invalidate(project_name)
+            return status == 200
+        except Exception as err:
+            print(f'[Smartcat API:upload_document]Exception: {err}')
+            return False
+
+    async def get_document_id(self, project_name, document_names):
+        ########################################################################
+        # Get document Id of documents
+        #
+        # Return value:
+        # > Datatype - dictionary
+        # > dictionary of document ids with document name as key and list of ids of document
+        ########################################################################
+        assert isinstance(project_name, str), "'project_name' should be of type 'string'"
+        assert isinstance(document_names, list), "'document_name' should be of type 'list'"
+        document_index = await self.get_document_index(project_name)
+        doc_ids = {}
+        for doc_name in document_names:
+            document_name = _document_key(doc_name)
+            doc_ids[document_name] = document_index.ids(document_name)
+        if self.debug:
+            print(f'[Smartcat API:get_document_id]Document ID: {doc_ids}')
+        return doc_ids
+
+    async def get_document_word_count(self, project_name, document_names):
+        ########################################################################
+        # Get document word count, statistics of all documents are requested concurrently
+        #
+        # Return value:
+        # > Datatype - dictionary
+        # > dictionary of word count with document name as key and list of status and word count of document.
+        ########################################################################
+        doc_ids = await self.get_document_id(project_name, document_names)
+        async def word_count(doc):
+            status, content = await self.request_smartcat('GET', self._smartcat_url['document_general']+'/statistics', request_query={'documentId': doc_ids[doc]})
+            received_response = self.make_response(status, content)
+            if received_response['response_code'] == 200:
+                return [True, Statistics.from_json(received_response['response']).words()]
+            return [False, 'Build statistics in progress']
+        counts = await asyncio.gather(*[word_count(doc) for doc in doc_ids])
+        return dict(zip(doc_ids, counts))
+
+    async def delete_document(self, project_name, document_names):
+        ########################################################################
+        # Delete document(s)
+        #
+        # Return value:
+        # > Datatype - boolean
+        # > True if document(s) deleted else False
+        ########################################################################
+        assert isinstance(document_names, list), "'document_names' should be of type 'list'"
+        doc_ids = await self.get_document_id(project_name, document_names)
+        delete_doc_ids = [Id for doc in doc_ids for Id in doc_ids[doc]]
+        queries = _split_query({'documentIds': delete_doc_ids}, self.max_url_length, len(self._smartcat_url['document_general']))
+        responses = await asyncio.gather(*[self.request_smartcat('DELETE', self._smartcat_url['document_general'], request_query=query) for query in queries])
+        if all(status == 204 for status, content in responses):
+            self._project_cache.update_documents(project_name, removed_ids=delete_doc_ids)
+            return True
+        self._project_cache.invalidate(project_name)
+        return False
+
+    async def check_doc_pretranslation_status(self, project_name, document_names):
+        ########################################################################
+        # Check Pretranslation status of document(s)
+        #
+        # Return value:
+        # > Datatype - dictionary
+        # > dictionary of status with document name as key and boolean status as value
+        ########################################################################
+        assert isinstance(project_name, str), "'project_name' should be of type 'string'"
+        assert isinstance(document_names, list), "'document_names' should be of type 'list'"
+        document_index = await self.get_document_index(project_name, refresh=True)
+        doc_status = {}
+        for doc_name in document_names:
+            document_name = _document_key(doc_name)
+            completed = document_index.completed(document_name)
+            if completed is not None:
+                doc_status[document_name] = completed
+        return doc_status
+
+    async def get_doc_task_id(self, document_id):
+        ########################################################################
+        # Get task id for document download. Each task id is for one time use only
+        #
+        # Return value:
+        # > Datatype - string
+        # > task id
+        ########################################################################
+        assert isinstance(document_id, str), "'document_id' should be of type 'string'"
+        resp = self.make_response(*await self.request_smartcat('POST', self._smartcat_url['document_download'], request_query={'documentIds': document_id}, idempotent=True))
+        if (resp['response_code'] == 200):
+            return ExportTask.from_json(resp['response']).id
+        else:
+            return resp['response']
+
+    async def download_document(self, project_name, document_name, document_save_as):
+        ########################################################################
+        # Download translated document
+        #
+        # Return value:
+        # > Datatype - boolean
+        # > True if document downloaded else False
+        ########################################################################
+        assert isinstance(project_name, str), "'project_name' should be of type 'string'"
+        assert isinstance(document_name, str), "'document_name' should be of type 'string'"
+        assert isinstance(document_save_as, str), "'document_save_as' should be of type 'string'"
+        doc_name = _document_key(document_name)
+        doc_id = (await self.get_document_id(project_name, [document_name]))[doc_name][0]
+        task_id = await self.get_doc_task_id(doc_id)
+        if task_id != '':
+            # export result is 204 until the export is ready
+            for attempt in range(300):
+                status, content = await self.request_smartcat('GET', self._smartcat_url['document_download']+'/'+task_id, save_as=document_save_as)
+                if status != 204:
+                    break
+                await asyncio.sleep(1)
+            return status == 200
+        else:
+            return False
+
+
+################################################################################
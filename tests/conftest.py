@@ -0,0 +1,20 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from smartcatapi import Smartcat
+from smartcat_mock_server import MockSmartcatServer
+
+
+@pytest.fixture
+def server():
+    with MockSmartcatServer() as mock_server:
+        yield mock_server
+
+
+@pytest.fixture
+def client(server):
+    with Smartcat(server_url=server.url, api_login_id='test', api_key='test', backoff_factor=0.01) as smartcat:
+        yield smartcat
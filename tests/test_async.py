@@ -0,0 +1,37 @@
+import asyncio
+import pytest
+
+pytest.importorskip('aiohttp')
+from smartcatapi_async import AsyncSmartcat
+
+
+def test_async_client_end_to_end(server, tmp_path):
+    server.latency = 0.05
+    file_paths = []
+    for name in ('intro.txt', 'chapter.one.txt'):
+        file_path = tmp_path / name
+        file_path.write_text(f'text of {name}')
+        file_paths.append(str(file_path))
+
+    async def scenario():
+        async with AsyncSmartcat(server_url=server.url, api_login_id='test', api_key='test', backoff_factor=0.01) as client:
+            assert (await client.create_project('Async', 'en', ['de']))['response_code'] == 200
+            # concurrent lookups of an uncached project share one listing
+            project_ids = await asyncio.gather(*[client.get_project_id('Async') for i in range(5)])
+            assert len(set(project_ids)) == 1
+            assert client.get_coalescing_stats()['coalesced'] == 4
+
+            assert all(await asyncio.gather(*[client.upload_document('Async', file_path) for file_path in file_paths]))
+            doc_ids = await client.get_document_id('Async', file_paths)
+            assert all(len(ids) == 1 for ids in doc_ids.values())
+            assert await client.check_doc_pretranslation_status('Async', file_paths) == {'intro': True, 'chapter.one': True}
+
+            save_as = str(tmp_path / 'intro.de.txt')
+            assert await client.download_document('Async', file_paths[0], save_as)
+            assert open(save_as).read()
+            assert not list(tmp_path.glob('*.part'))
+
+            assert await client.delete_document('Async', file_paths)
+            assert await client.get_document_id('Async', file_paths) == {'intro': [], 'chapter.one': []}
+
+    asyncio.run(scenario())
@@ -0,0 +1,16 @@
+import json
+from smartcat_cli import main
+
+
+def test_status_reports_unknown_documents(client, server, tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv('SMARTCAT_API_ID', 'test')
+    monkeypatch.setenv('SMARTCAT_API_KEY', 'test')
+    client.create_project('Status', 'en', ['de'])
+    file_path = tmp_path / 'notes.txt'
+    file_path.write_text('meeting notes')
+    assert client.upload_document('Status', str(file_path))
+
+    for wait in ([], ['--wait', '--timeout', '5', '--poll-interval', '0.01']):
+        assert main(['status', 'Status', 'notes.txt', 'typo.docx', '--server', server.url, '--quiet'] + wait) == 1
+        report = json.loads(capsys.readouterr().out)
+        assert report['results'] == {'notes': {'ok': True, 'result': 'completed'}, 'typo': {'ok': False, 'result': 'Document not found'}}
@@ -0,0 +1,54 @@
+import os
+import time
+import threading
+from smartcat_pipeline import TranslationPipeline
+
+
+def test_changed_file_exports_new_document(client, tmp_path):
+    client.create_project('Pipeline', 'en', ['de'])
+    source = tmp_path / 'f.txt'
+    source.write_text('first version')
+    state_file = str(tmp_path / 'job.json')
+    output = str(tmp_path / 'out')
+    pipeline = TranslationPipeline(client, 'Pipeline', output, state_file=state_file, poll_interval=0.01)
+
+    assert pipeline.run(str(source))['results'][str(source)][0]
+    first_id = open(os.path.join(output, 'f.txt')).readline().strip()
+
+    source.write_text('second version')
+    os.utime(source, (time.time() + 10, time.time() + 10))
+    assert pipeline.run(str(source))['results'][str(source)][0]
+    second_id = open(os.path.join(output, 'f.txt')).readline().strip()
+
+    assert second_id != first_id
+    assert second_id in client.get_document_id('Pipeline', [str(source)])['f']
+
+
+def _run_with_timeout(pipeline, paths, timeout=20):
+    outcome = {}
+    worker = threading.Thread(target=lambda: outcome.update(pipeline.run(paths)), daemon=True)
+    worker.start()
+    worker.join(timeout)
+    assert not worker.is_alive(), 'pipeline run did not return'
+    return outcome['results']
+
+
+def test_stage_errors_do_not_stop_run(client, tmp_path):
+    client.create_project('Pipeline', 'en', ['de'])
+    removed, failing, kept = (str(tmp_path / name) for name in ('removed.txt', 'failing.txt', 'kept.txt'))
+    for file_path in (removed, failing, kept):
+        open(file_path, 'w').write(file_path)
+
+    def progress(file_path, stage, status):
+        # a source file removed after upload and a callback raising must not hang the later stages
+        if file_path == removed and stage == 'upload':
+            os.remove(removed)
+        if file_path == failing and stage == 'pretranslation' and status:
+            raise RuntimeError('progress failed')
+
+    pipeline = TranslationPipeline(client, 'Pipeline', str(tmp_path / 'out'), state_file=str(tmp_path / 'job.json'), poll_interval=0.01, progress=progress)
+    results = _run_with_timeout(pipeline, [removed, failing, kept])
+
+    assert results[removed][0]
+    assert results[failing] == [False, 'progress failed']
+    assert results[kept][0]
@@ -0,0 +1,52 @@
+import smartcat_shard
+from smartcat_shard import ShardedSmartcat, _Account
+
+
+def test_rate_limit_divided_between_processes(server):
+    account = _Account(0, {'api_login_id': 'a', 'api_key': 'k', 'rate_limit': 10, 'rate_burst': 4}, {'server_url': server.url}, 5, [0], processes=2)
+    assert account.client._rate_limiter.rate == 5
+    assert account.client._rate_limiter.capacity == 2
+    account.client.close()
+
+
+def test_processes_share_work_and_merge_results(client, server, tmp_path):
+    client.create_project('Sharded', 'en', ['de'])
+    for i in range(12):
+        (tmp_path / f'doc{i}.txt').write_text(f'document {i}')
+    credentials = [{'api_login_id': 'a', 'api_key': 'k'}, {'api_login_id': 'b', 'api_key': 'k', 'name': 'second'}]
+    sharded = ShardedSmartcat(credentials, workers_per_account=2, processes=2, server_url=server.url)
+
+    report = sharded.upload_documents('Sharded', str(tmp_path / '*.txt'))
+    assert len(report['results']) == 12 and all(result[0] for result in report['results'].values())
+    assert [account['account'] for account in report['accounts']] == ['a', 'second']
+    assert sum(account['units'] for account in report['accounts']) == 12
+
+    names = [f'doc{i}' for i in range(12)] + ['missing']
+    report = sharded.delete_document('Sharded', names, batch_size=2)
+    assert list(report['results']) == names
+    assert report['results']['missing'] == [False, 'Document not found']
+    assert all(report['results'][name][0] for name in names[:-1])
+
+
+def test_statistics_keyed_by_document_name(client, server, tmp_path, monkeypatch):
+    client.create_project('Statistics', 'en', ['de'])
+    file_paths = []
+    for i in range(3):
+        file_path = tmp_path / f'doc{i}.txt'
+        file_path.write_text(f'document {i}')
+        assert client.upload_document('Statistics', str(file_path))
+        file_paths.append(str(file_path))
+    statistics = smartcat_shard._operations['statistics']
+
+    def failing_statistics(client, project_name, unit):
+        if file_paths[1] in unit:
+            raise RuntimeError('statistics failed')
+        return statistics(client, project_name, unit)
+
+    monkeypatch.setitem(smartcat_shard._operations, 'statistics', failing_statistics)
+    sharded = ShardedSmartcat([{'api_login_id': 'a', 'api_key': 'k'}], server_url=server.url)
+    report = sharded.get_documents_statistics('Statistics', file_paths + ['missing.txt'])
+    assert list(report['results']) == ['doc0', 'doc1', 'doc2', 'missing']
+    assert report['results']['doc1'] == [False, 'statistics failed']
+    assert report['results']['missing'] == [False, 'Document not found']
+    assert report['results']['doc0'][0] and report['results']['doc2'][0]
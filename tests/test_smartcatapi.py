@@ -0,0 +1,228 @@
+import io
+import os
+import json
+import time
+import threading
+import zipfile
+import pytest
+import requests
+from smartcatapi import Smartcat, _TranslationCache, _iter_json_array, _write_file
+
+
+def test_dotted_document_names(client, tmp_path):
+    client.create_project('Dotted', 'en', ['de', 'fr'])
+    file_path = tmp_path / 'release.v2.txt'
+    file_path.write_text('release notes')
+    assert client.upload_document('Dotted', str(file_path))
+
+    doc_ids = client.get_document_id('Dotted', [str(file_path)])
+    assert len(doc_ids['release.v2']) == 2
+    assert client.check_doc_pretranslation_status('Dotted', [str(file_path)]) == {'release.v2': True}
+
+    statistics = client.get_documents_statistics('Dotted', [str(file_path)])
+    assert statistics['release.v2'][0]
+
+    save_as = str(tmp_path / 'out' / 'release.v2.txt')
+    os.makedirs(os.path.dirname(save_as))
+    assert client.download_documents('Dotted', {str(file_path): save_as})[str(file_path)] == [True, save_as]
+    assert os.path.getsize(save_as) > 0
+
+    assert client.delete_document('Dotted', [str(file_path)])
+    assert client.get_document_id('Dotted', [str(file_path)]) == {'release.v2': []}
+
+
+def test_project_lookup_errors(client, server):
+    with pytest.raises(IndexError, match='Project not found'):
+        client.get_project_id('Missing')
+    client.create_project('Throttled', 'en', ['de'])
+    # every request is over a rate below one per second
+    server.throttle_rate = 0.5
+    with Smartcat(server_url=server.url, api_login_id='test', api_key='test', max_retries=0) as throttled:
+        with pytest.raises(requests.exceptions.HTTPError, match='429'):
+            throttled.get_project_id('Throttled')
+
+
+def test_download_languages_named_after_archive_entries(client, tmp_path):
+    client.create_project('Languages', 'en', ['de', 'fr'])
+    file_path = tmp_path / 'guide.md'
+    file_path.write_text('guide')
+    assert client.upload_document('Languages', str(file_path))
+    output_dir = str(tmp_path / 'out')
+    client.invalidate_project_cache()
+    results = client.download_document_languages('Languages', [str(file_path), 'missing.md'], output_dir)
+    assert results[str(file_path)] == {language: [True, os.path.join(output_dir, language, 'guide.md')] for language in ('de', 'fr')}
+    assert results['missing.md'] == {'de': [False, 'Document not found'], 'fr': [False, 'Document not found']}
+
+
+def _export_response(entries):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w') as zip_file:
+        for entry_name, content in entries:
+            zip_file.writestr(entry_name, content)
+    resp = requests.models.Response()
+    resp.status_code = 200
+    resp._content = archive.getvalue()
+    resp._content_consumed = True
+    resp.raw = io.BytesIO()
+    return resp
+
+
+def test_archive_entry_without_language_folder(client, tmp_path):
+    batch = [('a_de', 'a', 'id_de', str(tmp_path / 'a_de')), ('a_fr', 'a', 'id_fr', str(tmp_path / 'a_fr')), ('b', 'b', 'id_b', str(tmp_path / 'b'))]
+    results = client._save_export_result(_export_response([('a.txt', b'a'), ('b.txt', b'b')]), batch, {'id_de': 'de', 'id_fr': 'fr', 'id_b': 'de'})
+    assert results['a_de'] == results['a_fr'] == [False, 'Ambiguous export archive entry a.txt']
+    assert results['b'] == [True, str(tmp_path / 'b')]
+    assert not os.path.exists(tmp_path / 'a_de') and not os.path.exists(tmp_path / 'a_fr')
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 5, 64])
+def test_json_array_split_across_chunks(chunk_size):
+    data = json.dumps([1500.0, -2e10, 7, True, None, 'a,b]', {'x': [1, 2.5]}, [], {'name': 'q"]}[{\\ \u00fc', 'nested': [[{}], {'a': '}'}]}], ensure_ascii=False).encode('utf-8')
+    chunks = [data[i:i+chunk_size] for i in range(0, len(data), chunk_size)]
+    assert list(_iter_json_array(chunks)) == json.loads(data)
+
+
+def test_translation_cache_eviction(tmp_path):
+    source = tmp_path / 'source'
+    source.write_bytes(b'x' * 100)
+    cache_dir = str(tmp_path / 'cache')
+    cache = _TranslationCache(cache_dir, 250)
+    cache.put('a', 'r1', str(source))
+    cache.put('b', 'r1', str(source))
+    assert cache.get('a', 'r1', str(tmp_path / 'a.txt'))
+    cache.put('a', 'r2', str(source))
+    assert not cache.get('a', 'r1', str(tmp_path / 'a.txt'))
+    cache.put('c', 'r1', str(source))
+    # 'b' was used least recently
+    assert not cache.get('b', 'r1', str(tmp_path / 'b.txt'))
+    assert len(os.listdir(cache_dir)) == 2
+
+    reopened = _TranslationCache(cache_dir, 150)
+    assert len(os.listdir(cache_dir)) == 1
+    assert reopened.get('c', 'r1', str(tmp_path / 'c.txt'))
+
+    os.remove(reopened._path('c', 'r1'))
+    assert not reopened.get('c', 'r1', str(tmp_path / 'c.txt'))
+
+
+def test_write_file_reports_original_error(tmp_path):
+    save_as = str(tmp_path / 'missing' / 'file.txt')
+    with pytest.raises(FileNotFoundError) as error:
+        _write_file([b'data'], save_as)
+    assert error.value.__context__ is None
+
+    def failing_chunks():
+        yield b'data'
+        raise RuntimeError('connection lost')
+
+    with pytest.raises(RuntimeError, match='connection lost'):
+        _write_file(failing_chunks(), str(tmp_path / 'file.txt'))
+    assert os.listdir(tmp_path) == []
+
+
+def test_statistics_retried_only_while_building(client, server, tmp_path):
+    client.create_project('Statistics', 'en', ['de'])
+    server.statistics_delay = 0.2
+    file_path = tmp_path / 'report.txt'
+    file_path.write_text('quarterly report')
+    assert client.upload_document('Statistics', str(file_path))
+    assert client.get_documents_statistics('Statistics', [str(file_path)], retry_interval=0.05)['report'][0]
+
+    server._statistics = lambda document_ids: (403, {'error': 'Forbidden'}, 'application/json')
+    requests_before = server.request_count
+    statistics = client.get_documents_statistics('Statistics', [str(file_path)], retry_interval=0.05)
+    assert statistics == {'report': [False, 'Statistics request failed with response code 403']}
+    assert server.request_count - requests_before == 1
+
+
+def test_delete_split_within_max_url_length(server, tmp_path):
+    for i in range(100):
+        (tmp_path / f'doc{i}.txt').write_text(f'document {i}')
+    with Smartcat(server_url=server.url, api_login_id='test', api_key='test', max_url_length=300) as client:
+        client.create_project('Split', 'en', ['de', 'fr', 'es'])
+        assert all(result[0] for result in client.upload_documents('Split', str(tmp_path / '*.txt')).values())
+        names = [f'doc{i}' for i in range(100)]
+        assert sum(len(ids) for ids in client.get_document_id('Split', names).values()) == 300
+        urls = []
+        client.add_request_hook(lambda event: urls.append(event['url']) if event['method'] == 'DELETE' else None)
+        assert client.delete_document('Split', names)
+        assert len(urls) > 1 and all(len(url) <= 300 for url in urls)
+        client.invalidate_project_cache()
+        assert client.get_document_id('Split', names) == {name: [] for name in names}
+
+
+def test_sync_directory(client, tmp_path):
+    client.create_project('Sync', 'en', ['de'])
+    source = tmp_path / 'source'
+    for relative_path in ('a/readme.txt', 'b/readme.txt', 'changed.txt', 'removed.txt'):
+        (source / relative_path).parent.mkdir(parents=True, exist_ok=True)
+        (source / relative_path).write_text(f'text of {relative_path}')
+    download_dir = tmp_path / 'translated'
+
+    report = client.sync_directory('Sync', str(source), download_dir=str(download_dir))
+    assert sorted(report['uploaded']) == ['a/readme.txt', 'b/readme.txt', 'changed.txt', 'removed.txt']
+    assert report['failed'] == {}
+    assert len(report['downloaded']) == 4
+    # files of the same name in different directories are separate documents
+    readme_ids = [open(download_dir / 'de' / directory / 'readme.txt').readline().strip() for directory in 'ab']
+    assert readme_ids[0] != readme_ids[1]
+    assert sorted(client.get_document_id('Sync', ['readme.txt'])['readme']) == sorted(readme_ids)
+    changed_id = open(download_dir / 'de' / 'changed.txt').readline().strip()
+
+    (source / 'changed.txt').write_text('new text')
+    (source / 'removed.txt').unlink()
+    (source / 'new.txt').write_text('text of new.txt')
+    report = client.sync_directory('Sync', str(source), delete_removed=True, download_dir=str(download_dir))
+    assert report['uploaded'] == ['new.txt']
+    assert report['updated'] == ['changed.txt']
+    assert sorted(report['unchanged']) == ['a/readme.txt', 'b/readme.txt']
+    assert report['deleted'] == ['removed.txt']
+    assert sorted(report['downloaded']) == sorted(str(download_dir / 'de' / name) for name in ('changed.txt', 'new.txt'))
+    client.invalidate_project_cache()
+    assert client.get_document_id('Sync', ['changed.txt', 'removed.txt']) == {'changed': [open(download_dir / 'de' / 'changed.txt').readline().strip()], 'removed': []}
+    assert changed_id not in client.get_document_index('Sync').by_id
+
+    report = client.sync_directory('Sync', str(source), delete_removed=True, download_dir=str(download_dir))
+    assert sorted(report['unchanged']) == ['a/readme.txt', 'b/readme.txt', 'changed.txt', 'new.txt']
+    assert report['uploaded'] == report['updated'] == report['deleted'] == report['downloaded'] == []
+
+
+def test_retry_policy(server, tmp_path):
+    # a body not sent again in full leaves the server waiting for the rest until the timeout
+    with Smartcat(server_url=server.url, api_login_id='test', api_key='test', backoff_factor=0.01, timeout=5) as client:
+        client.create_project('Retry', 'en', ['de'])
+        client.get_project_id('Retry')
+        events = []
+        client.add_request_hook(events.append)
+        file_path = tmp_path / 'streamed.txt'
+        file_path.write_text(' '.join(f'word{i}' for i in range(5000)))
+
+        # a throttled upload waits for Retry-After, then sends the whole streamed body again
+        server.throttle_rate = 0.5
+        threading.Timer(0.3, setattr, (server, 'throttle_rate', None)).start()
+        started = time.monotonic()
+        assert client.upload_document('Retry', str(file_path))
+        assert time.monotonic() - started >= 1
+        assert server.throttled_count == 1
+        assert [event['retries'] for event in events if event['method'] == 'POST'] == [1]
+        assert client.get_document_word_count('Retry', [str(file_path)])['streamed'] == [True, 5000]
+
+        route = server.route
+        failures = {'GET': 2, 'POST': 1}
+
+        def failing_route(method, path, query, body, content_type):
+            if failures.get(method) and path in ('project/list', 'project/document'):
+                failures[method] -= 1
+                return 503, {'error': 'Service unavailable'}, 'application/json'
+            return route(method, path, query, body, content_type)
+
+        server.route = failing_route
+        # a GET answered with 5xx is repeated with backoff, a POST that reached the server is not
+        events.clear()
+        client.invalidate_project_cache()
+        assert client.get_project_id('Retry')
+        assert events[-1]['retries'] == 2 and events[-1]['status_code'] == 200
+        requests_before = server.request_count
+        assert not client.upload_document('Retry', str(file_path))
+        assert server.request_count - requests_before == 1
+        assert events[-1]['method'] == 'POST' and events[-1]['status_code'] == 503 and events[-1]['retries'] == 0
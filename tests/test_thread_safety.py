@@ -0,0 +1,73 @@
+import os
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+def test_shared_client_under_concurrency(client, server, tmp_path):
+    client.create_project('Shared', 'en', ['de', 'fr'])
+    file_paths = []
+    for i in range(40):
+        file_path = tmp_path / f'doc{i}.txt'
+        file_path.write_text(f'document {i}')
+        file_paths.append(str(file_path))
+    deleted = file_paths[::4]
+    client.reset_request_metrics()
+    requests_before = server.request_count
+
+    def upload_and_maybe_delete(file_path):
+        assert client.upload_document('Shared', file_path)
+        if file_path in deleted:
+            assert client.delete_document('Shared', [file_path])
+        return file_path
+
+    def read(i):
+        names = random.sample(file_paths, 5)
+        assert set(client.get_document_id('Shared', names)) == {os.path.splitext(os.path.basename(name))[0] for name in names}
+        client.check_doc_pretranslation_status('Shared', names)
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        uploads = executor.map(upload_and_maybe_delete, file_paths)
+        reads = executor.map(read, range(80))
+        assert sorted(uploads) == sorted(file_paths)
+        list(reads)
+
+    # cached listing agrees with the server after all writes
+    cached = client.get_document_id('Shared', file_paths)
+    fresh = client.get_document_index('Shared', refresh=True)
+    for file_path in file_paths:
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        expected = [] if file_path in deleted else sorted(fresh.ids(name))
+        assert sorted(cached[name]) == expected
+        assert len(fresh.ids(name)) == (0 if file_path in deleted else 2)
+
+    # every request sent was recorded exactly once
+    metrics = client.get_request_metrics()
+    assert sum(endpoint['count'] for endpoint in metrics.values()) == server.request_count - requests_before
+    assert sum(endpoint['errors'] for endpoint in metrics.values()) == 0
+    stats = client.get_cache_stats()
+    assert stats['hits'] > 0 and stats['size'] == 1
+
+
+def test_concurrent_project_lookups_share_one_request(client, server):
+    client.create_project('Coalesced', 'en', ['de'])
+    server.latency = 0.3
+    callers = 8
+    barrier = threading.Barrier(callers)
+    project_ids = []
+
+    def lookup():
+        barrier.wait()
+        project_ids.append(client.get_project_id('Coalesced'))
+
+    requests_before = server.request_count
+    threads = [threading.Thread(target=lookup) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(project_ids) == callers and len(set(project_ids)) == 1
+    assert server.request_count - requests_before == 1
+    stats = client.get_coalescing_stats()
+    assert (stats['executed'], stats['coalesced']) == (1, callers - 1)
+    assert stats['endpoints']['project_list'] == {'executed': 1, 'coalesced': callers - 1}